@@ -3,7 +3,10 @@
 # Description: Provided data structures necessary to complete the assignment.
 #              Please look through this file carefully to see what methods
 #              are available and how they're implemented.
-#              Don't modify the contents of this file.
+#              Also holds the hash functions shared by the HashMaps.
+
+
+import struct
 
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
@@ -19,9 +22,18 @@ class DynamicArray:
     append, pop, swap, get_at_index, set_at_index, length
     """
 
-    def __init__(self, arr=None) -> None:
-        """Initialize new dynamic array using a list."""
-        self._data = arr.copy() if arr else []
+    __slots__ = ('_data',)
+
+    def __init__(self, arr=None, copy: bool = True) -> None:
+        """
+        Initialize new dynamic array using a list.
+        The list is copied unless copy is False, in which case the array
+        takes it over and the caller must not use it anymore.
+        """
+        if not arr:
+            self._data = []
+        else:
+            self._data = arr.copy() if copy else arr
 
     def __iter__(self):
         """
@@ -96,6 +108,90 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_FNV_OFFSET_BASIS = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+_MIX_PRIME_1 = 0x9E3779B185EBCA87
+_MIX_PRIME_2 = 0xC2B2AE3D27D4EB4F
+_MIX_PRIME_3 = 0x165667B19E3779F9
+
+
+def hash_function_fnv1a(key: str) -> int:
+    """
+    64-bit FNV-1a hash of the UTF-8 encoding of the key.
+    Unlike the sample hash functions, the order of the characters matters
+    and every byte is spread over the whole 64 bits, so anagrams and keys
+    with a common prefix don't collide.
+    """
+    hash = _FNV_OFFSET_BASIS
+    for byte in key.encode('utf-8'):
+        hash = ((hash ^ byte) * _FNV_PRIME) & _MASK_64
+    return hash
+
+
+def hash_function_mix(key: str, seed: int = 0) -> int:
+    """
+    Seeded 64-bit hash in the style of xxHash.
+    The UTF-8 encoding of the key is consumed 8 bytes at a time rather than
+    one character at a time, and the result goes through a final avalanche
+    step so that every input bit affects every output bit. Different seeds
+    give independent hash functions (use functools.partial to pass one to a
+    HashMap).
+    """
+    data = key.encode('utf-8')
+    length = len(data)
+    # pad to a whole number of 64-bit words, the length is mixed in below so
+    # padding can't make two keys collide
+    data += bytes(-length % 8)
+
+    hash = (seed + _MIX_PRIME_3 + length) & _MASK_64
+    for (word,) in struct.iter_unpack('<Q', data):
+        hash = ((hash ^ word) * _MIX_PRIME_1) & _MASK_64
+        hash ^= hash >> 31
+
+    # final avalanche
+    hash ^= hash >> 33
+    hash = (hash * _MIX_PRIME_2) & _MASK_64
+    hash ^= hash >> 29
+    hash = (hash * _MIX_PRIME_3) & _MASK_64
+    hash ^= hash >> 32
+    return hash
+
+
+def hash_function_builtin(key: str) -> int:
+    """
+    Python's built-in string hash (SipHash), computed in C.
+    This is by far the fastest option, but string hashes are randomized per
+    process unless PYTHONHASHSEED is set, so the values must not be stored
+    or shared between processes.
+    """
+    return hash(key)
+
+
+# Stable ids for the hash functions whose values may be stored on disk. A
+# table written with one of them records its id, so it can only be opened
+# again with the same function. Ids must never be reused or renumbered;
+# hash_function_builtin has none since its values change between processes.
+HASH_FUNCTION_IDS = {
+    1: hash_function_1,
+    2: hash_function_2,
+    3: hash_function_fnv1a,
+    4: hash_function_mix,
+}
+
+
+def hash_function_id(function) -> int:
+    """
+    Returns the id of the given hash function in HASH_FUNCTION_IDS.
+    Raises ValueError for a function that has no id.
+    """
+    for function_id, known in HASH_FUNCTION_IDS.items():
+        if known is function:
+            return function_id
+    raise ValueError(f"{getattr(function, '__name__', function)!r} is not a "
+                     f"registered hash function, its values can't be stored")
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +199,21 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    # __slots__ keeps a per-instance __dict__ off every node, which matters
+    # since a hash map holds one node per key
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        The full hash of the key can be stored with it, so the hash map never
+        needs to run the key through the hash function again.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -119,6 +225,8 @@ class LinkedListIterator:
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -141,9 +249,12 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, remove, remove_node,
+    remove_counted, contains, find_counted, length, iterator
     """
 
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -168,38 +279,75 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
+    def insert(self, key: str, value: object, hash: int = None) -> None:
         """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+        self._head = SLNode(key, value, self._head, hash)
+        self._size += 1
+
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If the hash of the key is given, nodes with a different stored hash
+        are skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
+        return self.remove_node(key, hash) is not None
+
+    def remove_node(self, key: str, hash: int = None) -> SLNode:
+        """
+        Remove first node with matching key, same as remove(), and return
+        it, or None if no match.
+        """
+        return self.remove_counted(key, hash)[0]
+
+    def remove_counted(self, key: str, hash: int = None) -> (SLNode, int):
+        """
+        Same as remove_node(), but also return the number of nodes that were
+        examined.
+        """
         previous, node = None, self._head
+        examined = 0
         while node:
+            examined += 1
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node, examined
 
             previous, node = node, node.next
-        return False
+        return None, examined
+
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If the hash of the key is given, nodes with a different stored hash
+        are skipped without comparing keys.
+        """
+        return self.find_counted(key, hash)[0]
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def find_counted(self, key: str, hash: int = None) -> (SLNode, int):
+        """
+        Same as contains(), but also return the number of nodes that were
+        examined.
+        """
         node = self._head
+        examined = 0
         while node:
-            if node.key == key:
-                return node
+            examined += 1
+            if (hash is None or node.hash == hash) and node.key == key:
+                return node, examined
             node = node.next
-        return node
+        return None, examined
 
     def length(self) -> int:
         """Return the length of the list."""
@@ -210,11 +358,22 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone', 'expires_at')
+
+    def __init__(self, key: str, value: object, hash: int = None,
+                 expires_at: float = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        The full hash of the key can be stored with it, so the hash map never
+        needs to run the key through the hash function again. expires_at is
+        the time (on the hash map's clock) at which the entry stops being
+        visible, or None if it never expires.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
         self.is_tombstone = False
+        self.expires_at = expires_at
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
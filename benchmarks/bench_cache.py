@@ -0,0 +1,57 @@
+# Description: Replays Zipf-distributed key traces against a BoundedCache
+#              used as a memoization cache (get, and put on a miss) with the
+#              LRU and CLOCK policies, for a few cache sizes. Reports the hit
+#              ratio and the number of operations per second. The hit ratio
+#              should grow with the cache size and with the skew of the
+#              trace, with CLOCK staying close to LRU.
+#
+# Usage:       python -m benchmarks.bench_cache
+
+
+import bisect
+import itertools
+import random
+import time
+
+import hash_map_cache
+
+
+KEYS = 100_000
+REQUESTS = 500_000
+SKEWS = (0.8, 1.0, 1.2)
+CACHE_SIZES = (1_000, 10_000)
+
+
+def zipf_trace(skew: float, keys: int, requests: int, seed: int = 0) -> list:
+    """Return requests keys drawn from keys keys with Zipf(skew) popularity."""
+    weights = [1 / rank ** skew for rank in range(1, keys + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    rnd = random.Random(seed)
+    total = cumulative[-1]
+    return ['key' + str(bisect.bisect(cumulative, rnd.random() * total))
+            for _ in range(requests)]
+
+
+def replay(cache, trace: list) -> float:
+    """Run the trace through the cache, return the seconds taken."""
+    get, put = cache.get, cache.put
+    start = time.perf_counter()
+    for key in trace:
+        if get(key) is None:
+            put(key, key)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'skew':<6}{'size':>8}{'policy':>8}{'hit ratio':>11}"
+          f"{'evictions':>11}{'ops/s':>10}")
+    for skew in SKEWS:
+        trace = zipf_trace(skew, KEYS, REQUESTS)
+        for size in CACHE_SIZES:
+            for policy in hash_map_cache.POLICIES:
+                cache = hash_map_cache.BoundedCache(size, hash, policy)
+                elapsed = replay(cache, trace)
+                info = cache.cache_info()
+                print(f"{skew:<6}{size:>8}{policy:>8}"
+                      f"{info.hits / (info.hits + info.misses):>11.3f}"
+                      f"{info.evictions:>11}{REQUESTS / elapsed:>10.0f}")
@@ -0,0 +1,85 @@
+# Description: Multi-threaded stress test and throughput benchmark for the
+#              lock-striped ConcurrentHashMap, against the SC HashMap behind
+#              a single global lock. Every thread runs a mix of gets, puts
+#              and increments of shared counters; the counters are checked
+#              at the end to make sure no update was lost. Scaling with the
+#              thread count is only expected on free-threaded builds.
+#
+# Usage:       python -m benchmarks.bench_concurrent
+
+
+import random
+import sys
+import threading
+import time
+
+from hash_map_concurrent import ConcurrentHashMap
+import hash_map_sc
+
+
+THREAD_COUNTS = (1, 2, 4, 8)
+OPS_PER_THREAD = 50_000
+SHARED_COUNTERS = 100
+
+
+class GlobalLockHashMap:
+    """The SC HashMap with every operation behind one lock."""
+
+    def __init__(self, capacity: int, function) -> None:
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        with self._lock:
+            return self._map.get(key)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            return self._map.increment(key, amount)
+
+
+def run(map_class, thread_count: int) -> float:
+    """Returns the ops/sec of all threads together, after checking counters."""
+    m = map_class(1024, hash)
+    increments_per_thread = [0] * thread_count
+
+    def worker(thread_id: int) -> None:
+        rng = random.Random(thread_id)
+        own = 't' + str(thread_id) + '_'
+        for i in range(OPS_PER_THREAD):
+            roll = rng.random()
+            if roll < 0.7:
+                m.get(own + str(rng.randrange(i + 1)))
+            elif roll < 0.9:
+                m.put(own + str(i), i)
+            else:
+                m.increment('counter' + str(i % SHARED_COUNTERS))
+                increments_per_thread[thread_id] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,))
+               for t in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(m.get('counter' + str(i)) or 0 for i in range(SHARED_COUNTERS))
+    assert total == sum(increments_per_thread), "lost updates"
+    return thread_count * OPS_PER_THREAD / elapsed
+
+
+if __name__ == "__main__":
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"GIL enabled: {gil}")
+    print(f"{'map':<22}{'threads':>8}{'ops/sec':>12}")
+    for name, map_class in (("global lock", GlobalLockHashMap),
+                            ("striped (16 stripes)", ConcurrentHashMap)):
+        for thread_count in THREAD_COUNTS:
+            print(f"{name:<22}{thread_count:>8}"
+                  f"{run(map_class, thread_count):>12.0f}")
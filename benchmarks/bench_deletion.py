@@ -0,0 +1,54 @@
+# Description: Compares the quadratic probing / tombstone HashMap against
+#              the linear probing / backward shift deletion HashMap on mixed
+#              insert/delete workloads. For each delete ratio, a stream of
+#              random puts and removes is run, followed by a round of
+#              lookups over the surviving keys.
+#
+# Usage:       python -m benchmarks.bench_deletion
+
+
+import random
+import time
+
+import hash_map_lp
+import hash_map_oa
+
+
+OPERATIONS = 200_000
+KEY_SPACE = 50_000
+DELETE_RATIOS = (0.1, 0.25, 0.4, 0.5)
+
+
+def run(map_class, delete_ratio: float) -> (float, float):
+    """
+    Returns the ns/op of the mixed put/remove stream and the ns/op of the
+    lookups that follow it.
+    """
+    rng = random.Random(261)
+    keys = ['session' + str(i) for i in range(KEY_SPACE)]
+    ops = [(rng.random() < delete_ratio, rng.choice(keys))
+           for _ in range(OPERATIONS)]
+    m = map_class(64, hash)
+
+    start = time.perf_counter()
+    for is_delete, key in ops:
+        if is_delete:
+            m.remove(key)
+        else:
+            m.put(key, key)
+    mixed_ns = (time.perf_counter() - start) / OPERATIONS * 1e9
+
+    start = time.perf_counter()
+    for key in keys:
+        m.get(key)
+    get_ns = (time.perf_counter() - start) / KEY_SPACE * 1e9
+    return mixed_ns, get_ns
+
+
+if __name__ == "__main__":
+    print(f"{'engine':<24}{'deletes':>8}{'ns/mixed op':>13}{'ns/get':>9}")
+    for ratio in DELETE_RATIOS:
+        for name, map_class in (("quadratic + tombstones", hash_map_oa.HashMap),
+                                ("linear + backward shift", hash_map_lp.HashMap)):
+            mixed_ns, get_ns = run(map_class, ratio)
+            print(f"{name:<24}{ratio:>8.2f}{mixed_ns:>13.0f}{get_ns:>9.0f}")
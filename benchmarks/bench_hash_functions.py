@@ -0,0 +1,69 @@
+# Description: Compares the hash functions in a6_include on a few realistic
+#              key sets. For each function and key set it reports the time
+#              per key and how evenly the keys spread over a table with one
+#              bucket per key: the variance of the bucket occupancy (close
+#              to 1.0 for a uniform hash) and the largest bucket.
+#
+# Usage:       python -m benchmarks.bench_hash_functions
+
+
+import itertools
+import random
+import time
+
+from a6_include import (hash_function_1, hash_function_2,
+                        hash_function_fnv1a, hash_function_mix,
+                        hash_function_builtin)
+
+
+FUNCTIONS = (
+    ("hash_function_1", hash_function_1),
+    ("hash_function_2", hash_function_2),
+    ("fnv1a", hash_function_fnv1a),
+    ("mix", hash_function_mix),
+    ("builtin", hash_function_builtin),
+)
+
+
+def key_sets(count: int) -> dict:
+    """Returns a dict of key set name -> list of `count` keys."""
+    rng = random.Random(261)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return {
+        "sequential strN": ['str' + str(i) for i in range(count)],
+        "anagrams": [''.join(p) for p in
+                     itertools.islice(itertools.permutations('abcdefghi'),
+                                      count)],
+        "random words": [''.join(rng.choice(letters)
+                                 for _ in range(rng.randint(4, 12)))
+                         for _ in range(count)],
+        "url paths": ['/api/v2/users/' + str(rng.randrange(10 ** 9)) +
+                      '/sessions/' + format(rng.getrandbits(64), 'x')
+                      for _ in range(count)],
+    }
+
+
+def occupancy(function, keys: list) -> (float, int):
+    """
+    Hashes the keys into one bucket per key and returns the variance of
+    the bucket sizes and the size of the largest bucket.
+    """
+    buckets = [0] * len(keys)
+    for key in keys:
+        buckets[function(key) % len(keys)] += 1
+    mean = 1.0
+    variance = sum((size - mean) ** 2 for size in buckets) / len(buckets)
+    return variance, max(buckets)
+
+
+if __name__ == "__main__":
+    for set_name, keys in key_sets(50_000).items():
+        print(f"\n{set_name} ({len(keys)} keys)")
+        print(f"{'function':<18}{'ns/key':>9}{'variance':>11}{'max bucket':>12}")
+        for name, function in FUNCTIONS:
+            start = time.perf_counter()
+            for key in keys:
+                function(key)
+            ns_per_key = (time.perf_counter() - start) / len(keys) * 1e9
+            variance, largest = occupancy(function, keys)
+            print(f"{name:<18}{ns_per_key:>9.0f}{variance:>11.2f}{largest:>12}")
@@ -0,0 +1,55 @@
+# Description: Records the latency of every put() while a map grows from a
+#              small capacity to a million keys, for the quadratic probing
+#              HashMap (which rehashes the whole table inside the put that
+#              crosses the load factor) and the IncrementalHashMap (which
+#              spreads the rehash over the following operations). The
+#              median should be about the same; the tail (p99.9, max) is
+#              where the stop-the-world resizes show up.
+#
+# Usage:       python -m benchmarks.bench_incremental_resize
+
+
+import gc
+import time
+
+import hash_map_incremental
+import hash_map_oa
+
+
+SIZE = 1_000_000
+PERCENTILES = (50, 99, 99.9)
+
+
+def put_latencies(map_class, size: int) -> list:
+    """Return the sorted nanoseconds taken by each of `size` puts."""
+    m = map_class(16, hash)
+    keys = ['key' + str(i) for i in range(size)]
+    latencies = [0] * size
+    clock = time.perf_counter_ns
+    # collector pauses would dominate the tail of both maps alike
+    gc.disable()
+    try:
+        for i, key in enumerate(keys):
+            start = clock()
+            m.put(key, i)
+            latencies[i] = clock() - start
+    finally:
+        gc.enable()
+    latencies.sort()
+    return latencies
+
+
+def percentile(latencies: list, p: float) -> int:
+    """Return the p-th percentile of sorted latencies (nearest rank)."""
+    index = min(int(len(latencies) * p / 100), len(latencies) - 1)
+    return latencies[index]
+
+
+if __name__ == "__main__":
+    header = ''.join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print(f"{'map':<14}{header}{'max':>14}  (ns per put, {SIZE} puts)")
+    for name, map_class in (("OA", hash_map_oa.HashMap),
+                            ("incremental", hash_map_incremental.IncrementalHashMap)):
+        latencies = put_latencies(map_class, SIZE)
+        row = ''.join(f"{percentile(latencies, p):>10}" for p in PERCENTILES)
+        print(f"{name:<14}{row}{latencies[-1]:>14}")
@@ -0,0 +1,61 @@
+# Description: Measures the memory used by each HashMap variant with
+#              tracemalloc. Keys and values are created before tracing
+#              starts, so the numbers only cover the table itself: bytes per
+#              stored entry and bytes per slot, for tables sized to their
+#              contents and for large, sparse tables.
+#
+# Usage:       python -m benchmarks.bench_memory
+
+
+import gc
+import tracemalloc
+
+import hash_map_flat
+import hash_map_lp
+import hash_map_oa
+import hash_map_sc
+
+
+SIZES = (10_000, 100_000)
+SPARSE_CAPACITY = 1_000_000
+SPARSE_ENTRIES = 1_000
+LAYOUTS = (
+    ("SC, lazy buckets", hash_map_sc.HashMap),
+    ("OA, HashEntry per slot", hash_map_oa.HashMap),
+    ("LP, HashEntry per slot", hash_map_lp.HashMap),
+    ("OA, flat arrays", hash_map_flat.HashMap),
+)
+
+
+def table_bytes(map_class, keys: list, capacity: int) -> (int, int):
+    """
+    Builds a map of the given capacity holding the given keys and returns
+    the bytes allocated for it and its final capacity.
+    """
+    gc.collect()
+    tracemalloc.start()
+    m = map_class(capacity, hash)
+    for key in keys:
+        m.put(key, key)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used, m.get_capacity()
+
+
+if __name__ == "__main__":
+    print(f"{'layout':<24}{'entries':>10}{'capacity':>10}"
+          f"{'MB':>9}{'B/entry':>9}{'B/slot':>8}")
+    for size in SIZES:
+        keys = ['key' + str(i) for i in range(size)]
+        for name, map_class in LAYOUTS:
+            used, capacity = table_bytes(map_class, keys, size * 2 + 1)
+            print(f"{name:<24}{size:>10}{capacity:>10}{used / 2 ** 20:>9.1f}"
+                  f"{used / size:>9.0f}{used / capacity:>8.0f}")
+
+    print(f"\nsparse tables: {SPARSE_ENTRIES} entries, "
+          f"capacity {SPARSE_CAPACITY}")
+    print(f"{'layout':<24}{'MB':>9}{'B/slot':>8}")
+    keys = ['key' + str(i) for i in range(SPARSE_ENTRIES)]
+    for name, map_class in LAYOUTS:
+        used, capacity = table_bytes(map_class, keys, SPARSE_CAPACITY)
+        print(f"{name:<24}{used / 2 ** 20:>9.1f}{used / capacity:>8.1f}")
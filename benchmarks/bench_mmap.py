@@ -0,0 +1,54 @@
+# Description: Compares starting a process with a large table in memory by
+#              re-putting every entry into a hash_map_oa.HashMap against
+#              reopening a MmapHashMap written earlier. Reopening only maps
+#              the files, so it should take about the same time whatever
+#              the size; lookups then fault in only the pages they probe.
+#
+# Usage:       python -m benchmarks.bench_mmap
+
+
+import os
+import random
+import tempfile
+import time
+
+from a6_include import hash_function_fnv1a
+import hash_map_mmap
+import hash_map_oa
+
+
+SIZES = (10_000, 100_000)
+LOOKUPS = 10_000
+
+
+if __name__ == "__main__":
+    print(f"{'size':>10}{'OA rebuild s':>14}{'mmap open s':>14}"
+          f"{'mmap get us':>14}{'table MB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            keys = ['key' + str(i) for i in range(size)]
+            path = os.path.join(directory, 'table' + str(size))
+            with hash_map_mmap.MmapHashMap(path, size * 2 + 1) as m:
+                for i, key in enumerate(keys):
+                    m.put(key, i)
+
+            start = time.perf_counter()
+            rebuilt = hash_map_oa.HashMap(size * 2 + 1, hash_function_fnv1a)
+            for i, key in enumerate(keys):
+                rebuilt.put(key, i)
+            rebuild = time.perf_counter() - start
+
+            start = time.perf_counter()
+            m = hash_map_mmap.MmapHashMap(path)
+            opened = time.perf_counter() - start
+
+            sample = random.Random(size).sample(keys, LOOKUPS)
+            start = time.perf_counter()
+            for key in sample:
+                m.get(key)
+            per_get = (time.perf_counter() - start) / LOOKUPS
+            m.close()
+
+            print(f"{size:>10}{rebuild:>14.3f}{opened:>14.5f}"
+                  f"{per_get * 1e6:>14.1f}"
+                  f"{os.path.getsize(path) / 2**20:>10.1f}")
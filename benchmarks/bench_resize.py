@@ -0,0 +1,37 @@
+# Description: Times resize_table() for both HashMap variants across a range
+#              of table sizes. The time per entry should stay roughly flat
+#              as the size grows, i.e. a resize is a single linear pass.
+#              Python's built-in hash() is used so that collisions from the
+#              sample hash functions don't swamp the cost being measured.
+#
+# Usage:       python -m benchmarks.bench_resize
+
+
+import time
+
+import hash_map_oa
+import hash_map_sc
+
+
+SIZES = (1_000, 10_000, 100_000, 200_000)
+
+
+def time_resize(map_class, size: int) -> float:
+    """Return the seconds taken to double a map holding `size` keys."""
+    m = map_class(size * 2 + 1, hash)
+    for i in range(size):
+        m.put('key' + str(i), i)
+
+    start = time.perf_counter()
+    m.resize_table(m.get_capacity() * 2)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'map':<6}{'size':>10}{'seconds':>12}{'ns/entry':>12}")
+    for name, map_class in (("SC", hash_map_sc.HashMap),
+                            ("OA", hash_map_oa.HashMap)):
+        for size in SIZES:
+            elapsed = time_resize(map_class, size)
+            print(f"{name:<6}{size:>10}{elapsed:>12.4f}"
+                  f"{elapsed / size * 1e9:>12.0f}")
@@ -0,0 +1,42 @@
+# Description: Grows a separate chaining HashMap that starts with a tiny
+#              capacity through several orders of magnitude and times
+#              lookups at each size. With load factor driven resizing the
+#              chains stay short, so ns/get should stay flat. The run with
+#              resizing turned off shows what happens without it.
+#
+# Usage:       python -m benchmarks.bench_sc_growth
+
+
+import time
+
+from hash_map_sc import HashMap
+
+
+CHECKPOINTS = (1_000, 10_000, 100_000, 1_000_000)
+LOOKUPS = 10_000
+NO_RESIZE_LIMIT = 100_000
+
+
+def run(max_load, limit: int) -> None:
+    m = HashMap(50, hash, max_load=max_load, min_load=None)
+    size = 0
+    for checkpoint in CHECKPOINTS:
+        if checkpoint > limit:
+            break
+        while size < checkpoint:
+            m.put('key' + str(size), size)
+            size += 1
+
+        keys = ['key' + str(i * (size // LOOKUPS)) for i in range(LOOKUPS)]
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        ns_per_get = (time.perf_counter() - start) / LOOKUPS * 1e9
+        print(f"{str(max_load):>9}{size:>10}{m.get_capacity():>10}"
+              f"{m.table_load():>8.2f}{ns_per_get:>10.0f}")
+
+
+if __name__ == "__main__":
+    print(f"{'max_load':>9}{'size':>10}{'capacity':>10}{'load':>8}{'ns/get':>10}")
+    run(1.0, CHECKPOINTS[-1])
+    run(None, NO_RESIZE_LIMIT)
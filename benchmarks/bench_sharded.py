@@ -0,0 +1,46 @@
+# Description: Times a bulk build (put_many) and a bulk lookup (get_many) of
+#              a ShardedHashMap with 1, 2, 4 and 8 worker processes. With
+#              enough cores the build time should drop roughly with the
+#              number of workers, down to the part that stays in the calling
+#              process (hashing, partitioning and merging). With fewer cores
+#              than workers there is nothing to gain and the extra processes
+#              only add overhead.
+#
+# Usage:       python -m benchmarks.bench_sharded
+
+
+import os
+import time
+
+from a6_include import hash_function_mix
+import hash_map_sharded
+
+
+SIZE = 1_000_000
+SHARDS = 16
+WORKERS = (1, 2, 4, 8)
+
+
+if __name__ == "__main__":
+    keys = ['key' + str(i) for i in range(SIZE)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+
+    print(f"{SIZE} keys, {SHARDS} shards, {os.cpu_count()} CPUs")
+    print(f"{'workers':<10}{'build s':>10}{'speedup':>10}"
+          f"{'lookup s':>10}{'speedup':>10}")
+    base_build = base_lookup = None
+    for workers in WORKERS:
+        m = hash_map_sharded.ShardedHashMap(SIZE // 4, hash_function_mix,
+                                            shards=SHARDS)
+        start = time.perf_counter()
+        m.put_many(pairs, workers=workers)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m.get_many(keys, workers=workers)
+        lookup = time.perf_counter() - start
+
+        base_build = base_build or build
+        base_lookup = base_lookup or lookup
+        print(f"{workers:<10}{build:>10.2f}{base_build / build:>10.2f}"
+              f"{lookup:>10.2f}{base_lookup / lookup:>10.2f}")
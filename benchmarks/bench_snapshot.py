@@ -0,0 +1,65 @@
+# Description: Compares saving and restoring a map of 1M entries with dump()
+#              and load() against pickling the whole object graph, and
+#              against rebuilding it with put(). load() should be a
+#              fraction of both, since it reads the entries in a few large
+#              chunks and puts each one straight into its bucket.
+#
+# Usage:       python -m benchmarks.bench_snapshot
+
+
+import os
+import pickle
+import tempfile
+import time
+
+from a6_include import hash_function_fnv1a
+import hash_map_oa
+import hash_map_sc
+
+
+SIZE = 1_000_000
+
+
+def timed(function, *args) -> (float, object):
+    """Return the seconds taken by function(*args) and its result."""
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def pickle_dump(m, path: str) -> None:
+    with open(path, 'wb') as file:
+        pickle.dump(m, file, pickle.HIGHEST_PROTOCOL)
+
+
+def pickle_load(path: str):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def rebuild(map_class, keys: list):
+    m = map_class(11, hash_function_fnv1a)
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    return m
+
+
+if __name__ == "__main__":
+    keys = ['key' + str(i) for i in range(SIZE)]
+    print(f"{'map':<6}{'method':<10}{'save s':>10}{'restore s':>12}{'MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot')
+        for name, map_class in (("SC", hash_map_sc.HashMap),
+                                ("OA", hash_map_oa.HashMap)):
+            built, m = timed(rebuild, map_class, keys)
+            print(f"{name:<6}{'put':<10}{'':>10}{built:>12.2f}")
+
+            for method, save, restore in (
+                    ("pickle", pickle_dump, pickle_load),
+                    ("dump", map_class.dump, map_class.load)):
+                saved, _ = timed(save, m, path)
+                restored, copy = timed(restore, path)
+                assert copy.get_size() == SIZE and copy.get('key7') == 7
+                print(f"{name:<6}{method:<10}{saved:>10.2f}{restored:>12.2f}"
+                      f"{os.path.getsize(path) / 2**20:>8.1f}")
+                del copy
@@ -0,0 +1,345 @@
+# Description: Benchmark suite for the separate chaining and open addressing
+#              HashMaps, with machine-readable results for catching
+#              regressions between versions. Every combination of map, hash
+#              function (hash_function_1 and hash_function_2 by default),
+#              key distribution and size is timed on put, get (hits and misses),
+#              contains_key, get_keys, resize_table and remove, and the SC
+#              combinations also on find_mode (which has no OA version).
+#              Key distributions:
+#                uniform    - distinct random keys
+#                zipf       - draws from `size` keys with Zipf(1.0)
+#                             popularity, so the map holds far fewer keys
+#                anagrams   - groups of 8 anagrams of random 8 letter words
+#                sequential - 'str0', 'str1', ...
+#              Each timing is the best of --repeat runs, reported in
+#              nanoseconds per operation. The sample hash functions only
+#              sum character codes, which makes most combinations quadratic
+#              from about 100000 keys; once a put phase takes more than
+#              --budget seconds, that combination is marked over_budget and
+#              its larger sizes are skipped. Use --functions fnv1a mix to
+#              time the largest sizes.
+#              Results are written as JSON (--output); with --compare, each
+#              timing is also checked against a previous results file and the
+#              exit status is 1 if any got slower by more than --threshold.
+#
+# Usage:       python -m benchmarks.bench_suite [--sizes 1000 10000 ...]
+#                  [--maps sc oa] [--functions hash_function_1 ...]
+#                  [--distributions uniform zipf ...] [--repeat 3]
+#                  [--budget 10] [--output results.json]
+#                  [--compare baseline.json] [--threshold 0.1]
+#              Sizes up to 10000000 work (with a good hash function and
+#              a large budget), but take minutes per combination and
+#              several GB of memory.
+
+
+import argparse
+import bisect
+import datetime
+import gc
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from a6_include import (hash_function_1, hash_function_2,
+                        hash_function_fnv1a, hash_function_mix)
+import hash_map_oa
+import hash_map_sc
+
+
+MAPS = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+}
+FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a': hash_function_fnv1a,
+    'mix': hash_function_mix,
+}
+DEFAULT_FUNCTIONS = ('hash_function_1', 'hash_function_2')
+OPERATIONS = ('put', 'get_hit', 'get_miss', 'contains_key', 'get_keys',
+              'resize_table', 'remove', 'find_mode')
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+INITIAL_CAPACITY = 11
+# keys put between checks of the time budget
+CHUNK = 1_000
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def uniform_keys(size: int, rnd: random.Random) -> list:
+    """Distinct random keys of 6 to 12 letters."""
+    keys = set()
+    while len(keys) < size:
+        keys.add(''.join(rnd.choices(LETTERS, k=rnd.randint(6, 12))))
+    keys = list(keys)
+    rnd.shuffle(keys)
+    return keys
+
+
+def zipf_keys(size: int, rnd: random.Random) -> list:
+    """size draws from size keys, the i-th most popular with weight 1/i."""
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+    total = cumulative[-1]
+    return ['key' + str(bisect.bisect(cumulative, rnd.random() * total))
+            for _ in range(size)]
+
+
+def anagram_keys(size: int, rnd: random.Random) -> list:
+    """Groups of 8 distinct anagrams of random 8 letter words."""
+    keys = set()
+    while len(keys) < size:
+        letters = rnd.choices(LETTERS, k=8)
+        for _ in range(8):
+            rnd.shuffle(letters)
+            keys.add(''.join(letters))
+    keys = list(keys)[:size]
+    rnd.shuffle(keys)
+    return keys
+
+
+def sequential_keys(size: int, rnd: random.Random) -> list:
+    """'str0', 'str1', ... in order."""
+    return ['str' + str(i) for i in range(size)]
+
+
+DISTRIBUTIONS = {
+    'uniform': uniform_keys,
+    'zipf': zipf_keys,
+    'anagrams': anagram_keys,
+    'sequential': sequential_keys,
+}
+
+
+def fill(hash_map, keys: list, budget: float) -> float:
+    """
+    Puts every key into the map and returns the seconds taken, or None if
+    that went over budget (the map is then only partly filled).
+    """
+    put = hash_map.put
+    elapsed = 0.0
+    for start in range(0, len(keys), CHUNK):
+        chunk = keys[start:start + CHUNK]
+        begin = time.perf_counter()
+        for key in chunk:
+            put(key, key)
+        elapsed += time.perf_counter() - begin
+        if elapsed > budget:
+            return None
+    return elapsed
+
+
+def timed(function, *args) -> float:
+    """Returns the seconds taken by function(*args)."""
+    begin = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - begin
+
+
+def get_all(hash_map, keys: list) -> None:
+    get = hash_map.get
+    for key in keys:
+        get(key)
+
+
+def contains_all(hash_map, keys: list) -> None:
+    contains_key = hash_map.contains_key
+    for key in keys:
+        contains_key(key)
+
+
+def remove_all(hash_map, keys: list) -> None:
+    remove = hash_map.remove
+    for key in keys:
+        remove(key)
+
+
+def run_once(map_name: str, function, keys: list, misses: list,
+             budget: float) -> dict:
+    """
+    Runs every operation once on a fresh map and returns operation ->
+    seconds, or None if putting the keys went over budget.
+    """
+    hash_map = MAPS[map_name](INITIAL_CAPACITY, function)
+    seconds = {'put': fill(hash_map, keys, budget)}
+    if seconds['put'] is None:
+        return None
+
+    seconds['get_hit'] = timed(get_all, hash_map, keys)
+    seconds['get_miss'] = timed(get_all, hash_map, misses)
+    seconds['contains_key'] = timed(contains_all, hash_map, keys)
+    seconds['get_keys'] = timed(hash_map.get_keys)
+    seconds['resize_table'] = timed(hash_map.resize_table,
+                                    hash_map.get_capacity() * 2)
+    seconds['remove'] = timed(remove_all, hash_map, keys)
+    if map_name == 'sc':
+        seconds['find_mode'] = timed(hash_map_sc.find_mode, keys, function)
+    return seconds
+
+
+def run_case(map_name: str, function_name: str, distribution: str,
+             size: int, keys: list, misses: list, repeat: int,
+             budget: float) -> list:
+    """
+    Returns the result records of one combination, the best of repeat runs
+    for each operation.
+    """
+    case = {'map': map_name, 'function': function_name,
+            'distribution': distribution, 'size': size}
+    best = {}
+    for _ in range(repeat):
+        # collect garbage between runs rather than during them
+        gc.collect()
+        gc.disable()
+        try:
+            seconds = run_once(map_name, FUNCTIONS[function_name], keys,
+                               misses, budget)
+        finally:
+            gc.enable()
+        if seconds is None:
+            return [dict(case, operation='put', status='over_budget')]
+        for operation, elapsed in seconds.items():
+            best[operation] = min(elapsed, best.get(operation, elapsed))
+
+    records = []
+    for operation in OPERATIONS:
+        if operation not in best:
+            continue
+        # get_keys and resize_table are single calls over the whole table,
+        # still reported per key to keep sizes comparable
+        records.append(dict(case, operation=operation, status='ok',
+                            seconds=best[operation],
+                            ns_per_op=best[operation] / size * 1e9))
+    return records
+
+
+def run_suite(args) -> list:
+    """Runs every selected combination and returns all result records."""
+    records = []
+    for distribution in args.distributions:
+        # combinations that went over budget at a smaller size
+        over_budget = set()
+        for size in sorted(args.sizes):
+            rnd = random.Random(261)
+            keys = DISTRIBUTIONS[distribution](size, rnd)
+            # same shape as the keys, but never put in the map
+            misses = [key + '#' for key in keys]
+            for map_name in args.maps:
+                for function_name in args.functions:
+                    combination = (map_name, function_name)
+                    if combination in over_budget:
+                        records.append({'map': map_name, 'function': function_name,
+                                        'distribution': distribution, 'size': size,
+                                        'operation': 'put', 'status': 'skipped'})
+                        continue
+                    case_records = run_case(map_name, function_name, distribution,
+                                            size, keys, misses, args.repeat,
+                                            args.budget)
+                    if case_records[0]['status'] == 'over_budget':
+                        over_budget.add(combination)
+                    records.extend(case_records)
+                    print_records(case_records)
+    return records
+
+
+def print_records(records: list) -> None:
+    for record in records:
+        timing = (f"{record['ns_per_op']:>12.0f} ns/op" if record['status'] == 'ok'
+                  else f"{record['status']:>18}")
+        print(f"{record['map']:<4}{record['function']:<17}{record['distribution']:<12}"
+              f"{record['size']:>10} {record['operation']:<14}{timing}", flush=True)
+
+
+def git_commit() -> str:
+    """Returns the commit the working tree is at, or None outside git."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_key(record: dict) -> tuple:
+    return (record['map'], record['function'], record['distribution'],
+            record['size'], record['operation'])
+
+
+def compare(records: list, baseline_path: str, threshold: float) -> list:
+    """
+    Returns (record, baseline record, ratio) for every timing that is more
+    than threshold slower than the same timing in the baseline file.
+    """
+    with open(baseline_path) as file:
+        baseline = {record_key(record): record
+                    for record in json.load(file)['results']
+                    if record['status'] == 'ok'}
+
+    regressions = []
+    for record in records:
+        previous = baseline.get(record_key(record))
+        if record['status'] != 'ok' or previous is None:
+            continue
+        ratio = record['seconds'] / previous['seconds']
+        if ratio > 1 + threshold:
+            regressions.append((record, previous, ratio))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_suite',
+        description="Times the SC and OA HashMaps and writes the results as JSON.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--maps', nargs='+', choices=MAPS, default=list(MAPS))
+    parser.add_argument('--functions', nargs='+', choices=FUNCTIONS,
+                        default=list(DEFAULT_FUNCTIONS))
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS,
+                        default=list(DISTRIBUTIONS))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per combination, the best one is kept")
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help="seconds a put phase may take before the "
+                             "combination is abandoned")
+    parser.add_argument('--output', default='bench_suite.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="results file of a previous run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="slowdown (0.1 = 10%%) reported as a regression")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = datetime.datetime.now(datetime.timezone.utc)
+    records = run_suite(args)
+
+    results = {
+        'meta': {
+            'started': started.isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'sizes': sorted(args.sizes),
+            'repeat': args.repeat,
+            'budget': args.budget,
+        },
+        'results': records,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=1)
+    print(f"\n{len(records)} results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(records, args.compare, args.threshold)
+        for record, previous, ratio in regressions:
+            print(f"REGRESSION {record['map']} {record['function']} "
+                  f"{record['distribution']} {record['size']} {record['operation']}: "
+                  f"{previous['ns_per_op']:.0f} -> {record['ns_per_op']:.0f} ns/op "
+                  f"({ratio:.2f}x)")
+        print(f"{len(regressions)} regressions against {args.compare}")
+        sys.exit(1 if regressions else 0)
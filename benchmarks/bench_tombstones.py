@@ -0,0 +1,82 @@
+# Description: Delete-heavy churn against the open addressing HashMap. A
+#              fixed number of live keys is kept while keys are constantly
+#              removed and replaced by new ones. Tombstone count, effective
+#              load and lookup time should all stay bounded across rounds.
+#              A second case churns a table whose live load factor sits just
+#              below 0.5, where compacting without growing would leave no
+#              room for tombstones: the number of resizes and the slowest
+#              put should stay small.
+#
+# Usage:       python -m benchmarks.bench_tombstones
+
+
+import random
+import time
+
+from hash_map_oa import HashMap
+
+
+LIVE_KEYS = 20_000
+ROUNDS = 10
+CHURN_PER_ROUND = 20_000
+# live keys and churn for the case near the growth threshold
+NEAR_FULL_CAPACITY = 65_536
+NEAR_FULL_CHURN = 2_000
+
+
+if __name__ == "__main__":
+    rng = random.Random(261)
+    m = HashMap(LIVE_KEYS * 4, hash)
+    live = ['key' + str(i) for i in range(LIVE_KEYS)]
+    for key in live:
+        m.put(key, 0)
+    next_key = LIVE_KEYS
+
+    print(f"{'round':>5}{'tombstones':>12}{'eff. load':>11}"
+          f"{'capacity':>10}{'ns/get hit':>12}{'ns/get miss':>13}")
+    for round_number in range(1, ROUNDS + 1):
+        # replace random live keys with brand new ones
+        for _ in range(CHURN_PER_ROUND):
+            slot = rng.randrange(LIVE_KEYS)
+            m.remove(live[slot])
+            live[slot] = 'key' + str(next_key)
+            m.put(live[slot], next_key)
+            next_key += 1
+
+        start = time.perf_counter()
+        for key in live:
+            m.get(key)
+        hit_ns = (time.perf_counter() - start) / LIVE_KEYS * 1e9
+
+        start = time.perf_counter()
+        for i in range(LIVE_KEYS):
+            m.get('missing' + str(i))
+        miss_ns = (time.perf_counter() - start) / LIVE_KEYS * 1e9
+
+        print(f"{round_number:>5}{m.tombstone_count():>12}"
+              f"{m.effective_load():>11.2f}{m.get_capacity():>10}"
+              f"{hit_ns:>12.0f}{miss_ns:>13.0f}")
+
+    print(f"\nchurn at load factor {(NEAR_FULL_CAPACITY // 2 - 1) / NEAR_FULL_CAPACITY:.4f}")
+    m = HashMap(NEAR_FULL_CAPACITY, hash, instrument=True)
+    live = ['key' + str(i) for i in range(NEAR_FULL_CAPACITY // 2 - 1)]
+    for key in live:
+        m.put(key, 0)
+    resizes = m.get_stats()['resizes']
+
+    slowest = 0.0
+    start = time.perf_counter()
+    for _ in range(NEAR_FULL_CHURN):
+        slot = rng.randrange(len(live))
+        m.remove(live[slot])
+        live[slot] = 'key' + str(next_key)
+        put_start = time.perf_counter()
+        m.put(live[slot], next_key)
+        slowest = max(slowest, time.perf_counter() - put_start)
+        next_key += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{'ops':>6}{'resizes':>9}{'capacity':>10}{'us/op':>8}{'slowest put ms':>16}")
+    print(f"{NEAR_FULL_CHURN:>6}{m.get_stats()['resizes'] - resizes:>9}"
+          f"{m.get_capacity():>10}{elapsed / NEAR_FULL_CHURN * 1e6:>8.1f}"
+          f"{slowest * 1e3:>16.1f}")
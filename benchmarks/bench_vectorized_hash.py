@@ -0,0 +1,36 @@
+# Description: Throughput of the scalar hash functions in a6_include against
+#              their NumPy versions in hash_vectorized, hashing one batch of
+#              keys per call.
+#
+# Usage:       python -m benchmarks.bench_vectorized_hash
+
+
+import time
+
+import hash_vectorized
+
+
+BATCH_SIZES = (1_000, 100_000, 1_000_000)
+
+
+if __name__ == "__main__":
+    if hash_vectorized.np is None:
+        raise SystemExit("NumPy is not installed")
+
+    print(f"{'function':<22}{'keys':>10}{'scalar ns/key':>15}"
+          f"{'numpy ns/key':>14}{'speedup':>9}")
+    for size in BATCH_SIZES:
+        keys = ['user:' + str(i * 7919) + ':session' for i in range(size)]
+        for function, vectorized in hash_vectorized.VECTORIZED.items():
+            start = time.perf_counter()
+            expected = [function(key) for key in keys]
+            scalar = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = hash_vectorized.hash_keys(function, keys)
+            batched = time.perf_counter() - start
+
+            assert result == expected
+            print(f"{function.__name__:<22}{size:>10}"
+                  f"{scalar / size * 1e9:>15.0f}{batched / size * 1e9:>14.0f}"
+                  f"{scalar / batched:>9.1f}")
@@ -0,0 +1,301 @@
+# Description: asyncio facade over any of the HashMaps, for services that
+#              share a map between coroutines as an in-process cache.
+#              Single-key operations are O(1) and run right away on the
+#              event loop. Operations that walk or rebuild the whole table
+#              (resize_table, clear, get_keys, dump, load) run in an executor
+#              thread while the map is held exclusively; coroutines that
+#              need the map in the meantime wait, and concurrent gets of the
+#              same key share a single lookup. Batch operations run on the
+#              event loop in slices sized to take about stall_budget
+#              seconds each, yielding to other tasks between slices.
+#              A put() that makes the wrapped map grow still resizes it
+#              inline; wrap an IncrementalHashMap where that matters.
+
+
+import asyncio
+import time
+
+from a6_include import DynamicArray, hash_function_2
+
+
+# number of keys in the first slice of a batch, before any timing is known
+_FIRST_SLICE = 64
+
+
+class AsyncHashMap:
+    def __init__(self, hash_map, executor=None,
+                 stall_budget: float = 0.005) -> None:
+        """
+        Wraps the given hash map. Heavy operations run in the given
+        concurrent.futures executor (the event loop's default one if None).
+        It must be a thread pool, since they work on the map in place. Batch
+        operations keep the event loop busy for about stall_budget seconds
+        at a time.
+        """
+        self._map = hash_map
+        self._executor = executor
+        self._stall_budget = stall_budget
+        # held while a heavy operation runs in the executor
+        self._exclusive = asyncio.Lock()
+        # key -> task looking it up once the map is available again
+        self._pending_gets = {}
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    async def _ready(self) -> None:
+        """
+        Waits until no heavy operation is running on the map. The caller
+        must use the map before its next await.
+        """
+        while self._exclusive.locked():
+            async with self._exclusive:
+                pass
+
+    async def _offload(self, function, *args) -> object:
+        """
+        Runs function(*args) in the executor with the map held exclusively,
+        and returns its result.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._exclusive:
+            future = loop.run_in_executor(self._executor, function, *args)
+            try:
+                return await asyncio.shield(future)
+            finally:
+                # if the caller is cancelled, the map stays held until the
+                # executor is really done with it
+                if not future.done():
+                    await asyncio.wait({future})
+
+    async def _in_slices(self, items: list, function) -> list:
+        """
+        Calls function on consecutive slices of items and returns the
+        concatenated results (function returns a list, or None). Each slice
+        is sized from the time taken by the previous one to stay within the
+        stall budget.
+        """
+        results = []
+        slice_size = _FIRST_SLICE
+        start = 0
+        while start < len(items):
+            await self._ready()
+            begin = time.perf_counter()
+            result = function(items[start:start + slice_size])
+            elapsed = time.perf_counter() - begin
+            if result is not None:
+                results.extend(result)
+            start += slice_size
+
+            if elapsed > 0:
+                slice_size = max(1, int(slice_size * self._stall_budget / elapsed))
+            else:
+                slice_size *= 2
+            # let other tasks run between slices
+            await asyncio.sleep(0)
+        return results
+
+    async def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        if not self._exclusive.locked():
+            return self._map.get(key)
+
+        task = self._pending_gets.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._get_when_ready(key))
+            self._pending_gets[key] = task
+            task.add_done_callback(lambda _: self._pending_gets.pop(key, None))
+        # one caller giving up must not cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def _get_when_ready(self, key: str) -> object:
+        await self._ready()
+        return self._map.get(key)
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        await self._ready()
+        return self._map.contains_key(key)
+
+    async def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, adding it if the key is
+        not in the hash map yet.
+        """
+        await self._ready()
+        self._map.put(key, value)
+
+    async def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        await self._ready()
+        self._map.remove(key)
+
+    async def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value associated with each key of the
+        given iterable, in the same order, None for keys that are not in the
+        hash map. Other tasks may change the map between slices.
+        """
+        get_many = getattr(self._map, 'get_many', None)
+        if get_many is None:
+            def lookup(keys: list) -> list:
+                return [self._map.get(key) for key in keys]
+        else:
+            def lookup(keys: list) -> list:
+                values = get_many(keys)
+                return [values[i] for i in range(values.length())]
+        return DynamicArray(await self._in_slices(list(keys), lookup))
+
+    async def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of the given iterable into the hash map.
+        For a large batch, a map that can reserve room (the SC and OA
+        HashMaps) first grows in the executor, as its own put_many() would,
+        so that no slice has to resize it on the event loop.
+        """
+        pairs = list(pairs)
+        reserve = getattr(self._map, '_reserve', None)
+        if reserve is not None and len(pairs) > _FIRST_SLICE:
+            # repeated keys of the batch take a single slot
+            await self._offload(reserve, len(set(key for key, _ in pairs)))
+
+        put_many = getattr(self._map, 'put_many', None)
+        if put_many is None:
+            def insert(pairs: list) -> None:
+                for key, value in pairs:
+                    self._map.put(key, value)
+        else:
+            insert = put_many
+        await self._in_slices(pairs, insert)
+
+    async def remove_many(self, keys) -> None:
+        """
+        Removes every key of the given iterable from the hash map. Keys that
+        are not in the hash map are ignored.
+        """
+        remove_many = getattr(self._map, 'remove_many', None)
+        if remove_many is None:
+            def delete(keys: list) -> None:
+                for key in keys:
+                    self._map.remove(key)
+        else:
+            delete = remove_many
+        await self._in_slices(list(keys), delete)
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, in the executor.
+        """
+        await self._offload(self._map.resize_table, new_capacity)
+
+    async def clear(self) -> None:
+        """
+        Clears the contents of the hash map, in the executor.
+        """
+        await self._offload(self._map.clear)
+
+    async def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map, collected in the executor.
+        """
+        return await self._offload(self._map.get_keys)
+
+    async def dump(self, path: str) -> None:
+        """
+        Writes a snapshot of the hash map to path, in the executor, see
+        HashMap.dump().
+        """
+        await self._offload(self._map.dump, path)
+
+    async def load(self, path: str) -> None:
+        """
+        Replaces the contents of the hash map with the snapshot at path,
+        read in the executor, see HashMap.load(). The wrapped map is
+        replaced by the loaded one.
+        """
+        self._map = await self._offload(type(self._map).load, path)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    import hash_map_oa
+
+    async def ticker(lags: list, stop: asyncio.Event) -> None:
+        """Records how late the event loop wakes up a 1 ms sleep."""
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def main() -> None:
+        print("\nbatches and heavy operations")
+        print("----------------------------")
+        m = AsyncHashMap(hash_map_oa.HashMap(11, hash_function_2))
+        lags, stop = [], asyncio.Event()
+        tick = asyncio.create_task(ticker(lags, stop))
+
+        await m.put_many(('key' + str(i), i) for i in range(20000))
+        values = await m.get_many('key' + str(i) for i in range(0, 20000, 1000))
+        print(m.get_size(), m.get_capacity(), values)
+        await m.remove_many('key' + str(i) for i in range(10000))
+        keys = await m.get_keys()
+        print(m.get_size(), keys.length(), await m.get('key0'), await m.get('key10000'))
+
+        print("\ncoalesced gets")
+        print("--------------")
+        lookups = 0
+        inner_get = m._map.get
+
+        def counting_get(key: str) -> object:
+            nonlocal lookups
+            lookups += 1
+            return inner_get(key)
+        m._map.get = counting_get
+
+        resize = asyncio.create_task(m.resize_table(100000))
+        await asyncio.sleep(0)
+        results = await asyncio.gather(*(m.get('key12345') for _ in range(50)))
+        await resize
+        print(set(results), lookups, m.get_capacity())
+        del m._map.get
+
+        print("\ndump / load")
+        print("-----------")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot')
+            await m.dump(path)
+            await m.clear()
+            print(m.get_size())
+            await m.load(path)
+            print(m.get_size(), await m.get('key19999'), await m.contains_key('key1'))
+
+        stop.set()
+        await tick
+        # how long the event loop went without running the ticker
+        print("\nstall budget kept:", max(lags) < 0.05)
+
+    asyncio.run(main())
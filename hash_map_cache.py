@@ -0,0 +1,313 @@
+# Description: Bounded cache built on the separate chaining HashMap, for
+#              memoization without unbounded growth. The cache holds at most
+#              max_entries keys; putting a new key into a full cache evicts
+#              one first, chosen by the eviction policy:
+#                'lru'   - the least recently used key. Every hit moves the
+#                          key to the most recently used end.
+#                'clock' - an approximation of LRU (second chance). A hit
+#                          only sets a flag on the key, which is cheaper;
+#                          eviction sweeps a hand over the keys, clearing
+#                          flags, until it finds one without.
+#              Both keep the keys in a circular doubly linked list threaded
+#              through the chain nodes of the HashMap themselves, so every
+#              operation is O(1) and there is no second structure to keep
+#              in sync.
+
+
+from collections import namedtuple
+
+from a6_include import DynamicArray, SLNode, hash_function_1, hash_function_2
+import hash_map_sc
+
+
+CacheInfo = namedtuple('CacheInfo',
+                       ['hits', 'misses', 'evictions', 'max_entries', 'size'])
+
+POLICIES = ('lru', 'clock')
+
+
+class CacheNode(SLNode):
+    """
+    Chain node that also links into the recency list of a BoundedCache.
+    """
+
+    __slots__ = ('newer', 'older', 'referenced')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        super().__init__(key, value, None, hash)
+        self.newer = self
+        self.older = self
+        self.referenced = False
+
+
+class BoundedCache:
+    def __init__(self, max_entries: int, function, policy: str = 'lru') -> None:
+        """
+        Initialize new BoundedCache that holds at most max_entries keys and
+        evicts them according to the given policy, 'lru' or 'clock'.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+
+        # the table never holds more keys than it has buckets, so it never
+        # has to grow, and it never shrinks below its initial capacity
+        self._map = hash_map_sc.HashMap(max_entries, function)
+        self._hash_function = function
+        self._max_entries = max_entries
+        self._policy = policy
+
+        # sentinel of the recency list: its newer neighbour is the oldest
+        # key and its older neighbour the newest one
+        self._sentinel = CacheNode(None, None)
+        # next node the clock hand examines, the sentinel when unset
+        self._hand = self._sentinel
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the number of buckets of its table
+        """
+        return self._map.get_capacity()
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns the hit, miss and eviction counters along with the maximum
+        and current number of keys.
+        """
+        return CacheInfo(self._hits, self._misses, self._evictions,
+                         self._max_entries, self._map.get_size())
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _link_before(node: CacheNode, successor: CacheNode) -> None:
+        """
+        Links node into the recency list just older than successor.
+        """
+        older = successor.older
+        node.older = older
+        node.newer = successor
+        older.newer = node
+        successor.older = node
+
+    def _unlink(self, node: CacheNode) -> None:
+        """
+        Takes node out of the recency list, moving the clock hand off it.
+        """
+        if self._hand is node:
+            self._hand = node.newer
+        node.older.newer = node.newer
+        node.newer.older = node.older
+        node.newer = node.older = node
+
+    def _touch(self, node: CacheNode) -> None:
+        """
+        Records a use of the node's key.
+        """
+        if self._policy == 'lru':
+            if node.newer is not self._sentinel:
+                self._unlink(node)
+                self._link_before(node, self._sentinel)
+        else:
+            node.referenced = True
+
+    def _victim(self) -> CacheNode:
+        """
+        Returns the node of the key to evict next.
+        """
+        sentinel = self._sentinel
+        if self._policy == 'lru':
+            return sentinel.newer
+
+        # second chance: skip (and clear) referenced keys. This ends after
+        # at most one full turn, since every flag passed is cleared.
+        node = self._hand
+        while node is sentinel or node.referenced:
+            node.referenced = False
+            node = node.newer
+        # the hand moves on past the victim once it is unlinked
+        self._hand = node
+        return node
+
+    def _evict(self) -> None:
+        """
+        Removes one key chosen by the eviction policy.
+        """
+        node = self._victim()
+        self._unlink(node)
+        self._map._remove(node.key, node.hash)
+        self._evictions += 1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the cache, adding it if the key is not
+        in the cache yet. Adding a key to a full cache evicts another one.
+        """
+        hash = self._hash_function(key)
+        node = self._map._find_node(key, hash)
+        if node is not None:
+            node.value = value
+            self._touch(node)
+            return
+
+        if self._map.get_size() >= self._max_entries:
+            self._evict()
+
+        node = CacheNode(key, value, hash)
+        self._map._add(self._map._bucket_for(hash), node)
+        # new keys are the most recently used ones under LRU; under CLOCK
+        # they go just behind the hand, so they are examined last
+        self._link_before(node, self._sentinel if self._policy == 'lru'
+                          else self._hand)
+        return
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, counting a hit, or
+        None if the key is not in the cache, counting a miss.
+        """
+        node = self._map._find_node(key, self._hash_function(key))
+        if node is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._touch(node)
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the cache
+                 False - Otherwise
+        Neither the counters nor the recency of the key change.
+        """
+        return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the cache.
+        """
+        hash = self._hash_function(key)
+        node = self._map._find_node(key, hash)
+        if node is None:
+            return
+        self._unlink(node)
+        self._map._remove(key, hash)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._map.empty_buckets()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the cache. The counters are kept.
+        """
+        self._map.clear()
+        self._sentinel.newer = self._sentinel.older = self._sentinel
+        self._hand = self._sentinel
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs in the cache, from the oldest
+        to the newest key (for CLOCK, in the order the keys were added).
+        The cache must not be modified while the generator is in use.
+        """
+        node = self._sentinel.newer
+        while node is not self._sentinel:
+            yield node.key, node.value
+            node = node.newer
+
+    def keys(self):
+        """
+        Generator over the keys in the cache, see items().
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Generator over the values in the cache, see items().
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys in the cache, from
+        the oldest to the newest, see items().
+        """
+        return DynamicArray(list(self.keys()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nLRU example")
+    print("-----------")
+    cache = BoundedCache(3, hash_function_1)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    cache.get('a')          # 'b' is now the least recently used key
+    cache.put('d', 'D')     # evicts 'b'
+    print(cache.get_keys(), cache.get('b'), cache.cache_info())
+
+    print("\nCLOCK example")
+    print("-------------")
+    cache = BoundedCache(3, hash_function_1, policy='clock')
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    cache.get('a')          # 'a' gets a second chance
+    cache.put('d', 'D')     # evicts 'b'
+    cache.put('e', 'E')     # evicts 'c'
+    print(cache.get_keys(), cache.contains_key('a'), cache.cache_info())
+
+    print("\nagainst a reference LRU")
+    print("-----------------------")
+    import random
+    from collections import OrderedDict
+    rnd = random.Random(261)
+    cache, reference = BoundedCache(50, hash_function_2), OrderedDict()
+    result = True
+    for _ in range(20000):
+        key = 'key' + str(int(rnd.paretovariate(1.2)) % 200)
+        if rnd.random() < 0.5:
+            value = cache.get(key)
+            result &= value == reference.get(key)
+            if key in reference:
+                reference.move_to_end(key)
+        elif rnd.random() < 0.9:
+            cache.put(key, key)
+            reference[key] = key
+            reference.move_to_end(key)
+            if len(reference) > 50:
+                reference.popitem(last=False)
+        else:
+            cache.remove(key)
+            reference.pop(key, None)
+    print(result, list(cache.items()) == list(reference.items()),
+          cache.get_size(), cache.get_capacity())
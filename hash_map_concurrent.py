@@ -0,0 +1,288 @@
+# Description: Thread-safe HashMap built on the separate chaining HashMap
+#              with lock striping. The table is split into a fixed number of
+#              stripes, each one an independent hash_map_sc.HashMap guarded by
+#              its own lock, and every key belongs to exactly one stripe. An
+#              operation only locks the stripe of its key, so threads working
+#              on different stripes never wait on each other, and a stripe
+#              that grows or shrinks only blocks its own stripe. Operations
+#              that touch the whole table (resize_table, clear) take every
+#              stripe lock, always in the same order.
+
+
+import threading
+
+from a6_include import DynamicArray, hash_function_2
+import hash_map_sc
+
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+# 2^64 / golden ratio, for Fibonacci hashing
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+class ConcurrentHashMap:
+    def __init__(self, capacity: int, function, stripes: int = 16) -> None:
+        """
+        Initialize new ConcurrentHashMap with the given total capacity,
+        spread over the given number of stripes (rounded up to a power of
+        two).
+        """
+        self._stripe_bits = max(stripes - 1, 0).bit_length()
+        stripe_count = 1 << self._stripe_bits
+        stripe_capacity = max(capacity // stripe_count, 1)
+
+        self._hash_function = function
+        self._stripes = [hash_map_sc.HashMap(stripe_capacity, function)
+                         for _ in range(stripe_count)]
+        self._locks = [threading.Lock() for _ in range(stripe_count)]
+
+    def _stripe_index(self, hash: int) -> int:
+        """
+        Returns the stripe of the given hash. The stripe is picked from the
+        high bits of the hash multiplied by a large odd constant, so it is
+        independent of the low bits each stripe uses to pick a bucket.
+        """
+        if self._stripe_bits == 0:
+            return 0
+        mixed = ((hash & _MASK_64) * _FIBONACCI_MULTIPLIER) & _MASK_64
+        return mixed >> (64 - self._stripe_bits)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for index in range(len(self._stripes)):
+            with self._locks[index]:
+                out += 'stripe ' + str(index) + ':\n' + str(self._stripes[index])
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map. Stripes are read one after the other, so with
+        concurrent writers the result is a snapshot that may be slightly
+        out of date.
+        """
+        return sum(stripe.get_size() for stripe in self._stripes)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, summed over all stripes
+        """
+        return sum(stripe.get_capacity() for stripe in self._stripes)
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, adding it if the key is
+        not in the hash map yet.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        stripe = self._stripes[index]
+        with self._locks[index]:
+            stripe._insert(key, value, hash)
+            stripe._grow_if_full()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        with self._locks[index]:
+            node = self._stripes[index]._find_node(key, hash)
+            return None if node is None else node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        with self._locks[index]:
+            return self._stripes[index]._find_node(key, hash) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        stripe = self._stripes[index]
+        with self._locks[index]:
+            if stripe._remove(key, hash):
+                stripe._shrink_if_sparse()
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Atomically adds amount to the value associated with the given key,
+        treating a missing key as 0, and returns the new value.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        with self._locks[index]:
+            return self._stripes[index]._increment(key, hash, amount)
+
+    def update_with(self, key: str, function, default: object = None) -> object:
+        """
+        Atomically replaces the value associated with the given key by the
+        result of calling function on it (or on default if the key is not in
+        the hash map) and returns the new value. function runs while the
+        stripe is locked, so it must not use this map.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        with self._locks[index]:
+            return self._stripes[index]._update_with(key, hash, function, default)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Atomically returns the value associated with the given key, adding
+        the key with the default value first if it is not in the hash map.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        with self._locks[index]:
+            return self._stripes[index]._setdefault(key, hash, default)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Atomically removes the given key from the hash map and returns its
+        value, or default if the key is not in the hash map.
+        """
+        hash = self._hash_function(key)
+        index = self._stripe_index(hash)
+        stripe = self._stripes[index]
+        with self._locks[index]:
+            node = stripe._take(key, hash)
+            if node is None:
+                return default
+            stripe._shrink_if_sparse()
+            return node.value
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        count = 0
+        for index in range(len(self._stripes)):
+            with self._locks[index]:
+                count += self._stripes[index].empty_buckets()
+        return count
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def _lock_all(self) -> None:
+        """
+        Takes every stripe lock, in stripe order so that two threads doing
+        this at once can't deadlock.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """Releases every stripe lock."""
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the total capacity of the hash table, splitting it evenly
+        over the stripes. Every stripe is locked for the duration, so no
+        operation sees a half-resized table.
+        """
+        if new_capacity < 1:
+            return
+
+        stripe_capacity = max(new_capacity // len(self._stripes), 1)
+        self._lock_all()
+        try:
+            for stripe in self._stripes:
+                stripe.resize_table(stripe_capacity)
+        finally:
+            self._unlock_all()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        self._lock_all()
+        try:
+            for stripe in self._stripes:
+                stripe.clear()
+        finally:
+            self._unlock_all()
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs stored in the hash map. Each
+        stripe is copied under its lock before its pairs are yielded, so
+        writers are never blocked by a slow consumer; the result is
+        consistent per stripe but not across stripes.
+        """
+        for index in range(len(self._stripes)):
+            with self._locks[index]:
+                pairs = list(self._stripes[index].items())
+            yield from pairs
+
+    def keys(self):
+        """
+        Generator over the keys stored in the hash map, see items().
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Generator over the values stored in the hash map, see items().
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        return DynamicArray(list(self.keys()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nconcurrent increments")
+    print("---------------------")
+    m = ConcurrentHashMap(64, hash_function_2, stripes=8)
+
+    def worker(thread_id: int) -> None:
+        for i in range(2000):
+            m.increment('shared' + str(i % 50))
+            m.put('t' + str(thread_id) + '_' + str(i), i)
+            if i % 2:
+                m.remove('t' + str(thread_id) + '_' + str(i))
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 50 shared counters of 4 * 2000 / 50 each, plus 1000 kept keys per thread
+    print(all(m.get('shared' + str(i)) == 160 for i in range(50)))
+    print(m.get_size(), m.get_size() == 50 + 4 * 1000)
+
+    print("\nresize / clear")
+    print("--------------")
+    m.resize_table(20000)
+    print(m.get_capacity(), m.get_size(), m.contains_key('t0_0'), m.contains_key('t0_1'))
+    m.clear()
+    print(m.get_size(), m.get_keys())
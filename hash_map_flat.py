@@ -0,0 +1,326 @@
+# Description: Implementation of an open addressing HashMap with Quadratic
+#              Probing that keeps its table in flat parallel arrays instead of
+#              a DynamicArray of HashEntry objects. Keys and values live in
+#              two lists, the full hashes in an array of unsigned 64-bit ints
+#              and the slot states in a bytearray, so a stored pair costs a
+#              few machine words instead of a Python object per slot.
+#              Probing, tombstone handling and resizing follow hash_map_oa.
+
+
+from array import array
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+# slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        """
+        self._capacity = capacity
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the storage arrays with empty ones of the given capacity.
+        """
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._states = bytearray(capacity)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                entry = 'None'
+            else:
+                entry = (f"K: {self._keys[i]} V: {self._values[i]} "
+                         f"TS: {self._states[i] == TOMBSTONE}")
+            out += str(i) + ': ' + entry + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find_index(self, key: str, hash: int) -> int:
+        """
+        Returns the index of the live slot holding the given key, or -1 if
+        the key is not in the hash map.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        i_initial = hash % capacity
+        index = i_initial
+        j = 1
+        # the probing sequence repeats itself after capacity steps
+        while states[index] != EMPTY and j <= capacity:
+            if (states[index] == LIVE and hashes[index] == hash
+                    and keys[index] == key):
+                return index
+            index = (i_initial + (j * j)) % capacity
+            j += 1
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new
+        value. If the given key is not in the hash map, a key/value pair is
+        added.
+        If the load factor of the table is greater than or equal to 0.5, the
+        table is resized to double its current capacity first. If tombstones
+        push the effective load factor to 0.5, the table is compacted, at its
+        current capacity if live entries fill at most a quarter of it, so
+        that churn just below 0.5 doesn't compact on every put, and at
+        double the capacity otherwise.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        elif self.effective_load() >= 0.5:
+            if self._size * 4 > self._capacity:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity)
+
+        self._insert(key, value, self._hash_function(key) & _MASK_64)
+        return
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Puts the key/value pair into the table given the (64-bit) hash of
+        the key, without checking the load factor first.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        i_initial = hash % capacity
+        index = i_initial
+        reuse_index = -1
+        j = 1
+        while states[index] != EMPTY and j <= capacity:
+            if hashes[index] == hash and keys[index] == key:
+                # same key, revive it if it was removed
+                if states[index] == TOMBSTONE:
+                    states[index] = LIVE
+                    self._size += 1
+                    self._tombstones -= 1
+                self._values[index] = value
+                return
+            if states[index] == TOMBSTONE and reuse_index == -1:
+                reuse_index = index
+            index = (i_initial + (j * j)) % capacity
+            j += 1
+
+        if reuse_index != -1:
+            # the key is not in the map, take over the first tombstone
+            index = reuse_index
+            self._tombstones -= 1
+        elif states[index] != EMPTY:
+            # every position the probing sequence can reach is taken
+            self.resize_table(self._capacity * 2)
+            self._insert(key, value, hash)
+            return
+
+        keys[index] = key
+        self._values[index] = value
+        hashes[index] = hash
+        states[index] = LIVE
+        self._size += 1
+        return
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def effective_load(self) -> float:
+        """
+        Returns the load factor of the hash table counting tombstones as
+        occupied slots.
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones currently in the hash table.
+        """
+        return self._tombstones
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._states.count(EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table. All existing
+        key/value pairs remain in the new hash map, placed using their stored
+        hashes. Tombstones are dropped.
+        """
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+
+        while self._size / new_capacity >= 0.5:
+            new_capacity *= 2
+
+        old_keys, old_values = self._keys, self._values
+        old_hashes, old_states = self._hashes, self._states
+        live = [index for index in range(self._capacity)
+                if old_states[index] == LIVE]
+
+        while True:
+            self._allocate(new_capacity)
+            keys, values = self._keys, self._values
+            hashes, states = self._hashes, self._states
+            for old_index in live:
+                hash = old_hashes[old_index]
+                i_initial = hash % new_capacity
+                index = i_initial
+                j = 1
+                while states[index] != EMPTY and j <= new_capacity:
+                    index = (i_initial + (j * j)) % new_capacity
+                    j += 1
+                if states[index] != EMPTY:
+                    # quadratic probing couldn't reach an empty position
+                    break
+                keys[index] = old_keys[old_index]
+                values[index] = old_values[old_index]
+                hashes[index] = hash
+                states[index] = LIVE
+            else:
+                break
+            new_capacity *= 2
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+        return
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        index = self._find_index(key, self._hash_function(key) & _MASK_64)
+        if index == -1:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        if self._size == 0:
+            return False
+        return self._find_index(key, self._hash_function(key) & _MASK_64) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        If the key is not in the hash map, nothing happens.
+        """
+        index = self._find_index(key, self._hash_function(key) & _MASK_64)
+        if index == -1:
+            return
+
+        # the key stays in place so a later put() of the same key can
+        # revive the slot, the value is released right away
+        self._states[index] = TOMBSTONE
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+        return
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+        return
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        result_da = DynamicArray()
+        states, keys = self._states, self._keys
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                result_da.append(keys[index])
+
+        return result_da
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / remove churn")
+    print("------------------")
+    m = HashMap(50, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity())
+    for i in range(0, 150, 2):
+        m.remove('str' + str(i))
+    result = True
+    for i in range(150):
+        # odd keys must be present, even keys must be gone
+        result &= m.contains_key('str' + str(i)) == (i % 2 == 1)
+        result &= m.get('str' + str(i)) == (i * 100 if i % 2 else None)
+    print(result, m.get_size(), m.tombstone_count(), m.get_capacity())
+
+    print("\nresize")
+    print("------")
+    m = HashMap(75, hash_function_2)
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+        result = True
+        for key in keys:
+            result &= m.contains_key(str(key))
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nget_keys")
+    print("--------")
+    m = HashMap(10, hash_function_2)
+    for i in range(100, 200, 10):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys())
+    m.resize_table(1)
+    print(m.get_keys())
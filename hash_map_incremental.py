@@ -0,0 +1,363 @@
+# Description: Open addressing HashMap with incremental resizing, in the
+#              style of Redis dict rehashing. When the table needs to grow (or
+#              to be compacted because of tombstones), a second, bigger table
+#              is created and the old one is drained a few slots at a time:
+#              every operation moves at most MIGRATE_SLOTS old slots over.
+#              While both tables exist, lookups check the new table and then
+#              the old one. No single operation ever rehashes the whole
+#              table, so the worst-case latency of put() stays bounded.
+#              Both tables are hash_map_oa.HashMap instances.
+
+
+from a6_include import DynamicArray, HashEntry, hash_function_1, hash_function_2
+import hash_map_oa
+
+
+# old slots moved per operation while a migration is in progress. With 4,
+# the old table is usually drained before the inserts made in the meantime
+# can push the new table's load factor to 0.5 (see _make_room).
+MIGRATE_SLOTS = 4
+
+# tombstone left in the old table in place of every entry moved out of it
+_MOVED = HashEntry(None, None)
+_MOVED.is_tombstone = True
+
+
+def _keep_value(value: object) -> object:
+    """Used by setdefault() to leave an existing value untouched."""
+    return value
+
+
+class IncrementalHashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new IncrementalHashMap that uses
+        quadratic probing for collision resolution
+        """
+        self._hash_function = function
+        self._table = hash_map_oa.HashMap(capacity, function)
+        # table being drained into self._table, and the next slot to move
+        self._old = None
+        self._migrate_index = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = str(self._table)
+        if self._old is not None:
+            out += 'migrating from:\n' + str(self._old)
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        size = self._table.get_size()
+        if self._old is not None:
+            size += self._old.get_size()
+        return size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, i.e. of the table being migrated to
+        """
+        return self._table.get_capacity()
+
+    def is_migrating(self) -> bool:
+        """
+        Returns True while entries are still being moved to a new table.
+        """
+        return self._old is not None
+
+    # ------------------------------------------------------------------ #
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Sets up a new, empty table of the given capacity and starts draining
+        the current table into it.
+        """
+        # at most one migration at a time
+        if self._old is not None:
+            self._finish_migration()
+
+        self._old = self._table
+        self._table = hash_map_oa.HashMap(new_capacity, self._hash_function)
+        self._migrate_index = 0
+
+    def _make_room(self) -> None:
+        """
+        Starts a migration ahead of an insert if the load factor of the
+        table is greater than or equal to 0.5, counting tombstones.
+        """
+        table = self._table
+        if table.effective_load() < 0.5:
+            return
+
+        if self._old is not None:
+            # the new table filled up before the old one was drained, which
+            # can only happen after an explicit resize_table() to a small
+            # capacity
+            self._finish_migration()
+            if table.effective_load() < 0.5:
+                return
+
+        # The old table is drained after capacity / MIGRATE_SLOTS operations.
+        # Doubling, the new table starts at a load factor of at most 1/4 and
+        # gains at most 1/(2 * MIGRATE_SLOTS) from inserts in the meantime.
+        # When mostly tombstones trigger the migration, compacting at the
+        # same capacity is enough as long as the live entries fill at most a
+        # quarter of it; if inserts still catch up, the branch above
+        # finishes the migration at once.
+        capacity = table.get_capacity()
+        if table.get_size() * 4 > capacity:
+            capacity *= 2
+        self._start_migration(capacity)
+
+    def _step(self) -> None:
+        """
+        Moves up to MIGRATE_SLOTS slots of the old table to the new table.
+        """
+        old = self._old
+        if old is None:
+            return
+
+        buckets = old._buckets
+        end = min(self._migrate_index + MIGRATE_SLOTS, buckets.length())
+        for index in range(self._migrate_index, end):
+            hash_entry = buckets.get_at_index(index)
+            if hash_entry is not None and not hash_entry.is_tombstone:
+                self._table._insert(hash_entry.key, hash_entry.value,
+                                    hash_entry.hash, hash_entry.expires_at)
+                # leave a tombstone so the probing sequences of the entries
+                # still to be moved stay intact. Sharing one lets the entry
+                # be freed now rather than with the whole old table.
+                old._bury(hash_entry)
+                buckets.set_at_index(index, _MOVED)
+        self._migrate_index = end
+
+        if end == buckets.length():
+            self._old = None
+
+    def _finish_migration(self) -> None:
+        """
+        Moves everything left in the old table to the new table at once.
+        """
+        while self._old is not None:
+            self._step()
+
+    def _find_entry(self, key: str, hash: int) -> "HashEntry":
+        """
+        Returns the live hash entry holding the given key in either table,
+        or None if the key is not in the hash map.
+        """
+        hash_entry = self._table._find_entry(key, hash)
+        if hash_entry is None and self._old is not None:
+            hash_entry = self._old._find_entry(key, hash)
+        return hash_entry
+
+    def _take_from_old(self, key: str, hash: int) -> "HashEntry":
+        """
+        Removes the given key from the old table, if it is there, and
+        returns its hash entry, so that it can be stored in the new table.
+        """
+        if self._old is None:
+            return None
+        hash_entry = self._old._find_entry(key, hash)
+        if hash_entry is not None:
+            self._old._bury(hash_entry)
+        return hash_entry
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new
+        value. If the given key is not in the hash map, a key/value pair is
+        added.
+        """
+        self._step()
+        self._make_room()
+
+        hash = self._hash_function(key)
+        # new keys and updated keys both go to the new table
+        self._take_from_old(key, hash)
+        self._table._insert(key, value, hash)
+        return
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        self._step()
+        hash_entry = self._find_entry(key, self._hash_function(key))
+        if hash_entry is None:
+            return None
+        return hash_entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        self._step()
+        return self._find_entry(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        If the key is not in the hash map, nothing happens.
+        """
+        self.pop(key)
+        return
+
+    def update_with(self, key: str, function, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by the result of
+        calling function on it, or on default if the key is not in the hash
+        map (in which case the key is added). Returns the new value.
+        """
+        self._step()
+        self._make_room()
+
+        hash = self._hash_function(key)
+        hash_entry = self._table._find_entry(key, hash)
+        if hash_entry is not None:
+            hash_entry.value = function(hash_entry.value)
+            return hash_entry.value
+
+        # not moved yet (or not in the map at all), the result goes to the
+        # new table
+        hash_entry = self._take_from_old(key, hash)
+        if hash_entry is not None:
+            value = function(hash_entry.value)
+            self._table._insert(key, value, hash, hash_entry.expires_at)
+        else:
+            value = function(default)
+            self._table._insert(key, value, hash)
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, it is added with the default value, which is returned.
+        """
+        return self.update_with(key, _keep_value, default)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key from the hash map and returns the value that
+        was associated with it. If the key is not in the hash map, returns
+        default.
+        """
+        self._step()
+        hash = self._hash_function(key)
+        hash_entry = self._table._find_entry(key, hash)
+        if hash_entry is not None:
+            self._table._bury(hash_entry)
+            return hash_entry.value
+
+        hash_entry = self._take_from_old(key, hash)
+        if hash_entry is not None:
+            return hash_entry.value
+        return default
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the table being migrated to.
+        """
+        return self._table.empty_buckets()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table. The entries are
+        moved over incrementally by the operations that follow. A migration
+        that is still in progress is finished first.
+        """
+        if new_capacity < 1 or new_capacity < self.get_size():
+            return
+
+        self._finish_migration()
+        while self.get_size() / new_capacity >= 0.5:
+            new_capacity *= 2
+        self._start_migration(new_capacity)
+        return
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        self._old = None
+        self._table.clear()
+        return
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs stored in the hash map.
+        The hash map must not be modified while the generator is in use.
+        """
+        yield from self._table.items()
+        if self._old is not None:
+            yield from self._old.items()
+
+    def keys(self):
+        """
+        Generator over the keys stored in the hash map, see items().
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Generator over the values stored in the hash map, see items().
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        return DynamicArray(list(self.keys()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = IncrementalHashMap(50, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.is_migrating(), m.table_load(), m.get_size(), m.get_capacity())
+
+    print("\nget / remove during migration")
+    print("-----------------------------")
+    m = IncrementalHashMap(16, hash_function_2)
+    result = True
+    for i in range(1000):
+        m.put(str(i), i)
+        result &= m.get(str(i)) == i
+        if i % 3 == 0:
+            m.remove(str(i // 2))
+    expected = {str(i): i for i in range(1000)}
+    for i in range(0, 1000, 3):
+        expected.pop(str(i // 2), None)
+    print(result, dict(m.items()) == expected, m.get_size() == len(expected))
+
+    print("\nresize example")
+    print("--------------")
+    m.resize_table(5000)
+    print(m.is_migrating(), m.get_size(), m.get_capacity())
+    for i in range(2000):
+        m.contains_key(str(i))
+    print(m.is_migrating(), m.get_size(), m.get_capacity())
@@ -0,0 +1,256 @@
+# Description: Implementation of a HashMap by using a dynamic array as the
+#              underlying storage. Open Addressing with Linear Probing is
+#              implemented for collision resolution. Removal uses backward
+#              shift deletion instead of tombstones: the entries following a
+#              removed one are shifted back towards their home positions, so
+#              probing sequences never have to step over deleted entries.
+
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses
+        linear probing for collision resolution
+        """
+        self._buckets = DynamicArray()
+        for _ in range(capacity):
+            self._buckets.append(None)
+
+        self._capacity = capacity
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new
+        value. If the given key is not in the hash map, a key/value pair is
+        added.
+        If adding a pair would push the load factor of the table above 0.5,
+        the table is resized to double its current capacity first.
+        """
+        # growing before the table can fill up guarantees that every probing
+        # sequence ends at an empty position
+        if (self._size + 1) / self._capacity > 0.5:
+            self.resize_table(self._capacity * 2)
+
+        hash = self._hash_function(key)
+        index = hash % self._capacity
+        hash_entry = self._buckets.get_at_index(index)
+
+        # step forward until we find the key or an empty position
+        while hash_entry is not None:
+            if hash_entry.hash == hash and hash_entry.key == key:
+                hash_entry.value = value
+                return
+            index = (index + 1) % self._capacity
+            hash_entry = self._buckets.get_at_index(index)
+
+        self._buckets.set_at_index(index, HashEntry(key, value, hash))
+        self._size += 1
+        return
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        # there are no tombstones, so every bucket is either empty or holds
+        # a live entry
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table. All existing
+        key/value pairs remain in the new hash map and are rehashed.
+        """
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+
+        # size the new table once up front so that the moved entries keep the
+        # load factor below 0.5
+        while self._size / new_capacity >= 0.5:
+            new_capacity *= 2
+
+        new_da = DynamicArray()
+        for _ in range(new_capacity):
+            new_da.append(None)
+
+        # walk the old buckets once, moving every entry into the first empty
+        # position from its new home. Entries carry the full hash of their
+        # key, so nothing is hashed again.
+        for index in range(self._capacity):
+            hash_entry = self._buckets.get_at_index(index)
+            if hash_entry is None:
+                continue
+
+            new_index = hash_entry.hash % new_capacity
+            while new_da.get_at_index(new_index) is not None:
+                new_index = (new_index + 1) % new_capacity
+            new_da.set_at_index(new_index, hash_entry)
+
+        self._buckets = new_da
+        self._capacity = new_capacity
+        return
+
+    def _find_index(self, key: str) -> int:
+        """
+        Returns the index of the bucket holding the given key, or -1 if the
+        key is not in the hash map.
+        """
+        hash = self._hash_function(key)
+        index = hash % self._capacity
+        hash_entry = self._buckets.get_at_index(index)
+
+        while hash_entry is not None:
+            if hash_entry.hash == hash and hash_entry.key == key:
+                return index
+            index = (index + 1) % self._capacity
+            hash_entry = self._buckets.get_at_index(index)
+
+        return -1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        index = self._find_index(key)
+        if index == -1:
+            return None
+        return self._buckets.get_at_index(index).value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        if self._size == 0:
+            return False
+        return self._find_index(key) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        If the key is not in the hash map, nothing happens.
+        """
+        hole = self._find_index(key)
+        if hole == -1:
+            return
+
+        # shift back every following entry of the cluster that is allowed to
+        # move into the hole, i.e. whose home position isn't cyclically
+        # between the hole and its current position
+        index = (hole + 1) % self._capacity
+        hash_entry = self._buckets.get_at_index(index)
+        while hash_entry is not None:
+            home = hash_entry.hash % self._capacity
+            if (index - home) % self._capacity >= (index - hole) % self._capacity:
+                self._buckets.set_at_index(hole, hash_entry)
+                hole = index
+            index = (index + 1) % self._capacity
+            hash_entry = self._buckets.get_at_index(index)
+
+        self._buckets.set_at_index(hole, None)
+        self._size -= 1
+        return
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        new_da = DynamicArray()
+        for _ in range(self._capacity):
+            new_da.append(None)
+        self._buckets = new_da
+        self._size = 0
+        return
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        result_da = DynamicArray()
+        for index in range(self._capacity):
+            hash_entry = self._buckets.get_at_index(index)
+            if hash_entry is not None:
+                result_da.append(hash_entry.key)
+
+        return result_da
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / remove churn")
+    print("------------------")
+    m = HashMap(50, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), m.table_load(), m.get_size(), m.get_capacity())
+    for i in range(0, 150, 2):
+        m.remove('str' + str(i))
+    result = True
+    for i in range(150):
+        # odd keys must be present, even keys must be gone
+        result &= m.contains_key('str' + str(i)) == (i % 2 == 1)
+        result &= m.get('str' + str(i)) == (i * 100 if i % 2 else None)
+    print(result, m.get_size(), m.get_capacity(), m.empty_buckets())
+
+    print("\nresize")
+    print("------")
+    m = HashMap(75, hash_function_2)
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+        result = True
+        for key in keys:
+            result &= m.contains_key(str(key))
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nget_keys")
+    print("--------")
+    m = HashMap(10, hash_function_2)
+    for i in range(100, 200, 10):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys())
+    m.resize_table(1)
+    print(m.get_keys())
@@ -0,0 +1,510 @@
+# Description: Persistent open addressing HashMap with Quadratic Probing whose
+#              table lives in a memory-mapped file, for tables too large to
+#              rebuild with put() every time a process starts.
+#              The table file holds a small header followed by fixed-width
+#              slots of four unsigned 64-bit words: hash, key offset, value
+#              offset and state. Keys (UTF-8) and values (pickled) are
+#              variable length, so they are appended to a separate heap file
+#              and the slots only point at them. Opening an existing map maps
+#              both files without reading them, and a lookup only touches the
+#              slots it probes plus the heap records of keys whose stored
+#              hash matches.
+#              Probing, tombstone handling and resizing follow hash_map_oa.
+#              Updated and removed records stay in the heap, which only ever
+#              grows until clear().
+
+
+import mmap
+import os
+import pickle
+import struct
+
+from a6_include import (DynamicArray, hash_function_fnv1a, hash_function_id,
+                        HASH_FUNCTION_IDS)
+
+
+# slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+_TABLE_MAGIC = b'HMAPOA01'
+_HEAP_MAGIC = b'HMAPHP01'
+# header words: magic, hash function id, capacity, size, tombstones
+_HEADER_SIZE = 64
+_CAPACITY, _SIZE, _TOMBSTONES = 2, 3, 4
+# slot words: hash, key offset, value offset, state
+_SLOT_WORDS = 4
+_SLOT_SIZE = 8 * _SLOT_WORDS
+# heap records are a 32-bit length followed by that many bytes
+_RECORD_LENGTH = struct.Struct('<I')
+
+
+class MmapHashMap:
+    def __init__(self, path: str, capacity: int = 11,
+                 function=hash_function_fnv1a) -> None:
+        """
+        Opens the map stored at path (plus path + '.heap'), or creates an
+        empty one with the given capacity if the file does not exist.
+        The hash function must be registered in a6_include.HASH_FUNCTION_IDS
+        and, for an existing map, be the one it was created with.
+        """
+        self._path = path
+        self._heap_path = path + '.heap'
+        function_id = hash_function_id(function)
+
+        if not os.path.exists(path):
+            self._create_table(path, capacity, function_id)
+            with open(self._heap_path, 'wb') as heap_file:
+                heap_file.write(_HEAP_MAGIC)
+
+        self._map_table()
+        if self._header[1] != function_id:
+            stored = HASH_FUNCTION_IDS.get(self._header[1])
+            self.close()
+            raise ValueError(f"{path} was created with "
+                             f"{getattr(stored, '__name__', stored)}, "
+                             f"not {function.__name__}")
+        self._hash_function = function
+
+        # appends go straight to the file; reads go through a map of it
+        # that is extended when a record past its end is needed
+        self._heap_file = open(self._heap_path, 'r+b', buffering=0)
+        self._heap_file.seek(0, os.SEEK_END)
+        self._heap = mmap.mmap(self._heap_file.fileno(), 0)
+
+    @staticmethod
+    def _create_table(path: str, capacity: int, function_id: int) -> None:
+        """
+        Writes an empty table file with the given capacity.
+        """
+        with open(path, 'wb') as table_file:
+            table_file.write(struct.pack('<8s4Q', _TABLE_MAGIC, function_id,
+                                         capacity, 0, 0))
+            table_file.truncate(_HEADER_SIZE + capacity * _SLOT_SIZE)
+
+    def _map_table(self) -> None:
+        """
+        Maps the table file and sets up views of its header and slots.
+        """
+        self._table_file = open(self._path, 'r+b')
+        self._table = mmap.mmap(self._table_file.fileno(), 0)
+        if self._table[:8] != _TABLE_MAGIC:
+            self._table.close()
+            self._table_file.close()
+            raise ValueError(f"{self._path} is not a hash map table file")
+        self._header = memoryview(self._table)[:_HEADER_SIZE].cast('Q')
+        self._slots = memoryview(self._table)[_HEADER_SIZE:].cast('Q')
+        self._capacity = self._header[_CAPACITY]
+
+    def _unmap_table(self) -> None:
+        """
+        Releases the views of the table file and unmaps it.
+        """
+        self._header.release()
+        self._slots.release()
+        self._table.close()
+        self._table_file.close()
+
+    def close(self) -> None:
+        """
+        Flushes the map to disk and closes its files.
+        """
+        if self._table.closed:
+            return
+        self._table.flush()
+        self._unmap_table()
+        if hasattr(self, '_heap'):
+            self._heap.close()
+            self._heap_file.close()
+
+    def flush(self) -> None:
+        """
+        Writes changes to the table file back to disk.
+        """
+        self._table.flush()
+
+    def __enter__(self) -> "MmapHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        slots = self._slots
+        for i in range(self._capacity):
+            base = i * _SLOT_WORDS
+            state = slots[base + 3]
+            if state == EMPTY:
+                entry = 'None'
+            else:
+                entry = (f"K: {self._read_key(slots[base + 1])} "
+                         f"V: {self._read_value(slots[base + 2])} "
+                         f"TS: {state == TOMBSTONE}")
+            out += str(i) + ': ' + entry + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._header[_SIZE]
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _append(self, data: bytes) -> int:
+        """
+        Appends a record to the heap and returns its offset.
+        """
+        offset = self._heap_file.tell()
+        self._heap_file.write(_RECORD_LENGTH.pack(len(data)) + data)
+        return offset
+
+    def _read(self, offset: int) -> bytes:
+        """
+        Returns the bytes of the heap record at the given offset.
+        """
+        heap = self._heap
+        if offset + _RECORD_LENGTH.size > len(heap):
+            heap = self._remap_heap()
+        (length,) = _RECORD_LENGTH.unpack_from(heap, offset)
+        start = offset + _RECORD_LENGTH.size
+        if start + length > len(heap):
+            heap = self._remap_heap()
+        return heap[start:start + length]
+
+    def _remap_heap(self) -> mmap.mmap:
+        """
+        Maps the heap file again to cover the records appended since it was
+        last mapped.
+        """
+        self._heap.close()
+        self._heap = mmap.mmap(self._heap_file.fileno(), 0)
+        return self._heap
+
+    def _read_key(self, offset: int) -> str:
+        return self._read(offset).decode('utf-8')
+
+    def _read_value(self, offset: int) -> object:
+        return pickle.loads(self._read(offset))
+
+    def _find_index(self, key_bytes: bytes, hash: int) -> int:
+        """
+        Returns the index of the live slot holding the given (encoded) key,
+        or -1 if the key is not in the hash map.
+        """
+        slots = self._slots
+        capacity = self._capacity
+        i_initial = hash % capacity
+        index = i_initial
+        j = 1
+        # the probing sequence repeats itself after capacity steps
+        while j <= capacity:
+            base = index * _SLOT_WORDS
+            state = slots[base + 3]
+            if state == EMPTY:
+                break
+            if (state == LIVE and slots[base] == hash
+                    and self._read(slots[base + 1]) == key_bytes):
+                return index
+            index = (i_initial + (j * j)) % capacity
+            j += 1
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the given key already
+        exists in the hash map, its associated value is replaced with the new
+        value. If the given key is not in the hash map, a key/value pair is
+        added.
+        If the load factor of the table is greater than or equal to 0.5, the
+        table is resized to double its current capacity first. If tombstones
+        push the effective load factor to 0.5, the table is compacted, at its
+        current capacity if live entries fill at most a quarter of it, and at
+        double the capacity otherwise. Compacting rewrites the table file, so
+        it must leave room for many removals before the next one.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        elif self.effective_load() >= 0.5:
+            if self.get_size() * 4 > self._capacity:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity)
+
+        key_bytes = key.encode('utf-8')
+        hash = self._hash_function(key) & _MASK_64
+        value_offset = self._append(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        slots = self._slots
+        capacity = self._capacity
+        i_initial = hash % capacity
+        index = i_initial
+        reuse_index = -1
+        j = 1
+        while j <= capacity:
+            base = index * _SLOT_WORDS
+            state = slots[base + 3]
+            if state == EMPTY:
+                break
+            if slots[base] == hash and self._read(slots[base + 1]) == key_bytes:
+                # same key, revive it if it was removed
+                if state == TOMBSTONE:
+                    slots[base + 3] = LIVE
+                    self._header[_SIZE] += 1
+                    self._header[_TOMBSTONES] -= 1
+                slots[base + 2] = value_offset
+                return
+            if state == TOMBSTONE and reuse_index == -1:
+                reuse_index = index
+            index = (i_initial + (j * j)) % capacity
+            j += 1
+
+        if reuse_index != -1:
+            # the key is not in the map, take over the first tombstone
+            index = reuse_index
+            self._header[_TOMBSTONES] -= 1
+        elif j > capacity:
+            # every position the probing sequence can reach is taken
+            self.resize_table(self._capacity * 2)
+            self.put(key, value)
+            return
+
+        base = index * _SLOT_WORDS
+        slots[base] = hash
+        slots[base + 1] = self._append(key_bytes)
+        slots[base + 2] = value_offset
+        slots[base + 3] = LIVE
+        self._header[_SIZE] += 1
+        return
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._header[_SIZE] / self._capacity
+
+    def effective_load(self) -> float:
+        """
+        Returns the load factor of the hash table counting tombstones as
+        occupied slots.
+        """
+        return (self._header[_SIZE] + self._header[_TOMBSTONES]) / self._capacity
+
+    def tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones currently in the hash table.
+        """
+        return self._header[_TOMBSTONES]
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        slots = self._slots
+        return sum(1 for base in range(3, len(slots), _SLOT_WORDS)
+                   if slots[base] == EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table. The new table is
+        written to a temporary file, placing every live slot by its stored
+        hash (keys and values stay where they are in the heap), and then
+        replaces the old one. Tombstones are dropped.
+        """
+        size = self._header[_SIZE]
+        if new_capacity < 1 or new_capacity < size:
+            return
+
+        while size / new_capacity >= 0.5:
+            new_capacity *= 2
+
+        old_slots = self._slots
+        live = [base for base in range(0, len(old_slots), _SLOT_WORDS)
+                if old_slots[base + 3] == LIVE]
+
+        new_path = self._path + '.resize'
+        while True:
+            self._create_table(new_path, new_capacity, self._header[1])
+            with open(new_path, 'r+b') as new_file, \
+                    mmap.mmap(new_file.fileno(), 0) as new_table, \
+                    memoryview(new_table) as view:
+                with view[_HEADER_SIZE:].cast('Q') as slots:
+                    placed = self._place_all(old_slots, live, slots, new_capacity)
+                if placed:
+                    with view[:_HEADER_SIZE].cast('Q') as header:
+                        header[_SIZE] = size
+                    new_table.flush()
+            if placed:
+                break
+            new_capacity *= 2
+
+        self._unmap_table()
+        os.replace(new_path, self._path)
+        self._map_table()
+        return
+
+    @staticmethod
+    def _place_all(old_slots, live: list, slots, capacity: int) -> bool:
+        """
+        Copies the given live slots into the empty slots of a new table.
+        Returns False if quadratic probing couldn't reach an empty position
+        for one of them.
+        """
+        for old_base in live:
+            hash = old_slots[old_base]
+            i_initial = hash % capacity
+            index = i_initial
+            j = 1
+            while slots[index * _SLOT_WORDS + 3] != EMPTY and j <= capacity:
+                index = (i_initial + (j * j)) % capacity
+                j += 1
+            base = index * _SLOT_WORDS
+            if slots[base + 3] != EMPTY:
+                return False
+            slots[base:base + _SLOT_WORDS] = old_slots[old_base:old_base + _SLOT_WORDS]
+        return True
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        index = self._find_index(key.encode('utf-8'),
+                                 self._hash_function(key) & _MASK_64)
+        if index == -1:
+            return None
+        return self._read_value(self._slots[index * _SLOT_WORDS + 2])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        if self._header[_SIZE] == 0:
+            return False
+        return self._find_index(key.encode('utf-8'),
+                                self._hash_function(key) & _MASK_64) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        If the key is not in the hash map, nothing happens.
+        """
+        index = self._find_index(key.encode('utf-8'),
+                                 self._hash_function(key) & _MASK_64)
+        if index == -1:
+            return
+
+        self._slots[index * _SLOT_WORDS + 3] = TOMBSTONE
+        self._header[_SIZE] -= 1
+        self._header[_TOMBSTONES] += 1
+        return
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map, emptying the heap file too.
+        """
+        self._table[_HEADER_SIZE:] = bytes(self._capacity * _SLOT_SIZE)
+        self._header[_SIZE] = 0
+        self._header[_TOMBSTONES] = 0
+
+        self._heap.close()
+        self._heap_file.truncate(len(_HEAP_MAGIC))
+        self._heap_file.seek(0, os.SEEK_END)
+        self._heap = mmap.mmap(self._heap_file.fileno(), 0)
+        return
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs stored in the hash map, in
+        slot order. The hash map must not be modified while the generator
+        is in use.
+        """
+        slots = self._slots
+        for base in range(0, len(slots), _SLOT_WORDS):
+            if slots[base + 3] == LIVE:
+                yield (self._read_key(slots[base + 1]),
+                       self._read_value(slots[base + 2]))
+
+    def keys(self):
+        """
+        Generator over the keys stored in the hash map, see items().
+        """
+        slots = self._slots
+        for base in range(0, len(slots), _SLOT_WORDS):
+            if slots[base + 3] == LIVE:
+                yield self._read_key(slots[base + 1])
+
+    def values(self):
+        """
+        Generator over the values stored in the hash map, see items().
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        return DynamicArray(list(self.keys()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import tempfile
+
+    from a6_include import hash_function_2
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table')
+
+        print("\nput / remove, then reopen")
+        print("-------------------------")
+        with MmapHashMap(path, 10, hash_function_2) as m:
+            for i in range(150):
+                m.put('str' + str(i), {'n': i, 'sq': i * i})
+            for i in range(0, 150, 2):
+                m.remove('str' + str(i))
+            m.put('str1', 'updated')
+            print(m.get_size(), m.get_capacity(), m.tombstone_count())
+
+        with MmapHashMap(path, function=hash_function_2) as m:
+            result = True
+            for i in range(150):
+                expected = None if i % 2 == 0 else {'n': i, 'sq': i * i}
+                if i == 1:
+                    expected = 'updated'
+                result &= m.get('str' + str(i)) == expected
+                result &= m.contains_key('str' + str(i)) == (i % 2 == 1)
+            print(result, m.get_size(), m.get_capacity(), m.tombstone_count())
+
+        print("\nwrong hash function")
+        print("-------------------")
+        try:
+            MmapHashMap(path)
+        except ValueError as error:
+            print(error)
+
+        print("\nresize / clear")
+        print("--------------")
+        with MmapHashMap(path, function=hash_function_2) as m:
+            m.resize_table(1000)
+            print(m.get_size(), m.get_capacity(), m.get('str149'))
+            m.clear()
+            m.put('日本', [1, 2])
+            print(m.get_size(), list(m.items()), os.path.getsize(path + '.heap'))
@@ -9,24 +9,52 @@
 #              stored in the array as hash entries.
 
 
+import functools
+import time
+
 from a6_include import (DynamicArray, HashEntry,
                         hash_function_1, hash_function_2)
+from hash_map_snapshot import read_snapshot, write_snapshot
+from hash_map_stats import HashMapStats
+from hash_vectorized import hash_keys
+
+
+# slots examined by the sweep a put() does once any key has a TTL
+SWEEP_SLOTS = 4
+
+
+def _keep_value(value: object) -> object:
+    """Used by setdefault() to leave an existing value untouched."""
+    return value
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, clock=time.monotonic,
+                 instrument: bool = False) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Time to live of keys is measured with the given clock, a function
+        returning the current time in seconds.
+        If instrument is True, statistics are collected, see get_stats().
         """
-        self._buckets = DynamicArray()
-        for _ in range(capacity):
-            self._buckets.append(None)
+        self._buckets = DynamicArray([None] * capacity, copy=False)
 
         self._capacity = capacity
         self._hash_function = function
         self._size = 0
+        self._tombstones = 0
+
+        self._clock = clock
+        # set once a key is given a time to live, until then no lookup needs
+        # to read the clock and put() doesn't sweep
+        self._has_ttl = False
+        # next slot for sweep() to examine
+        self._sweep_index = 0
+
+        # HashMapStats while instrumented, None otherwise
+        self._stats = HashMapStats() if instrument else None
+        self._bind_hash()
 
     def __str__(self) -> str:
         """
@@ -54,7 +82,7 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
-    def put(self, key: str, value: object) -> None:
+    def put(self, key: str, value: object, ttl: float = None) -> None:
         """
         Updates the key/value pair in the hash map. If the given key already
         exists in the hash map, its associated value must be replaced with
@@ -63,48 +91,258 @@ class HashMap:
         If this method is called and the current load factor of the table is
         greater than or equal to 0.5, the table must be resized to double its
         current capacity.
+        If ttl is given, the key expires that many seconds from now, after
+        which it is treated as absent; otherwise it never expires (a previous
+        TTL of the key is dropped).
         """
-        # remember, if the load factor is greater than or equal to 0.5,
-        # resize the table before putting the new key/value pair
-        if self.table_load() >= 0.5:
-            self.resize_table(self._capacity * 2)
+        if self._has_ttl:
+            self.sweep(SWEEP_SLOTS)
 
+        # remember, if the load factor is greater than or equal to 0.5
+        # (counting tombstones), make room before putting the new key/value
+        # pair
+        if (self._size + self._tombstones) * 2 >= self._capacity:
+            self._make_room()
+
+        expires_at = None if ttl is None else self._expiry(ttl)
         # running key through hash function
-        i_initial = self._hash_function(key) % self._capacity
+        hash = self._hash(key)
+
+        # the probing loop of _probe(), kept in this frame since put() is by
+        # far the most frequent insert
+        capacity = self._capacity
+        buckets = self._buckets
+        i_initial = hash % capacity
         # getting hash_entry at index
-        hash_entry = self._buckets.get_at_index(i_initial)
+        hash_entry = buckets.get_at_index(i_initial)
 
-        # if empty at i_initial, insert element and stop
-        if hash_entry is None:
-            new_hash_entry = HashEntry(key, value)
-            self._buckets.set_at_index(i_initial, new_hash_entry)
-            self._size += 1
+        new_index = i_initial
+        reuse_index = -1
+        found = False
+        j = 1
+        while hash_entry is not None and j <= capacity:
+            # first check if current hash entry has the same key, comparing
+            # the stored hashes first to skip most other keys cheaply
+            if hash_entry.hash == hash and hash_entry.key == key:
+                found = True
+                break
+            if hash_entry.is_tombstone and reuse_index == -1:
+                reuse_index = new_index
+            # otherwise, proceed with quadratic probing scheme
+            new_index = (i_initial + (j * j)) % capacity
+            j += 1
+            hash_entry = buckets.get_at_index(new_index)
+
+        if self._stats is not None:
+            self._stats.record('put', min(j, capacity))
+
+        if found:
+            # if hash_entry is a tombstone, set it to False before updating.
+            # An expired entry is simply overwritten.
+            if hash_entry.is_tombstone:
+                hash_entry.is_tombstone = False
+                self._size += 1
+                self._tombstones -= 1
+            # update its value and stop
+            hash_entry.value = value
+            hash_entry.expires_at = expires_at
+            return
+
+        if reuse_index != -1:
+            # taking over a tombstone
+            new_index = reuse_index
+            self._tombstones -= 1
+        elif hash_entry is not None:
+            # every position the probing sequence can reach is taken, grow
+            # the table and try again
+            self.resize_table(capacity * 2)
+            self._insert(key, value, hash, expires_at)
             return
 
-        # otherwise, start search for empty position by computing next index
-        # in the probing sequence
+        # at this point, we've arrived at an empty (or reusable) position
+        buckets.set_at_index(new_index, HashEntry(key, value, hash, expires_at))
+        self._size += 1
+        return
+
+    def _expiry(self, ttl: float) -> float:
+        """
+        Returns the expiry time of a key put now with the given time to live,
+        None for no time to live.
+        """
+        if ttl is None:
+            return None
+        self._has_ttl = True
+        return self._clock() + ttl
+
+    def _is_expired(self, hash_entry: HashEntry) -> bool:
+        """
+        Returns True if the hash entry is live but past its expiry time.
+        """
+        return (hash_entry.expires_at is not None
+                and not hash_entry.is_tombstone
+                and hash_entry.expires_at <= self._clock())
+
+    def _make_room(self) -> None:
+        """
+        Resizes the table ahead of an insert if the load factor is greater
+        than or equal to 0.5.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        # tombstones take up slots in the probing sequence just like live
+        # entries, so once they push the effective load factor to 0.5 the
+        # table is compacted. It stays at its current capacity only if the
+        # live entries fill at most a quarter of it: that leaves at least a
+        # quarter of the capacity in removals before the next compaction, so
+        # churn just below a load factor of 0.5 doesn't rehash on every put
+        elif self.effective_load() >= 0.5:
+            if self._size * 4 > self._capacity:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity)
+        return
+
+    def _probe(self, key: str, hash: int) -> (HashEntry, int):
+        """
+        Follows the probing sequence of the given key. Returns the hash entry
+        holding the key (which may be a tombstone), or None if there is none,
+        along with the index where the key would be inserted: the first
+        tombstone or empty position on the way, or -1 if the sequence
+        reaches neither.
+        If the map is instrumented, the number of slots examined is recorded
+        as a 'put'.
+        """
+        i_initial = hash % self._capacity
+        # getting hash_entry at index
+        hash_entry = self._buckets.get_at_index(i_initial)
+
+        # if empty at i_initial, the key goes right there. Otherwise, start
+        # search for empty position by computing next index in the probing
+        # sequence. The first tombstone we pass is remembered so it can be
+        # reused if the key turns out not to be in the map.
+        # The sequence repeats itself after capacity steps, so the search
+        # is bounded by the capacity.
+        new_index = i_initial
+        reuse_index = -1
+        found = False
         j = 1
-        while hash_entry is not None:
-            # first check if current hash entry has the same key
-            if hash_entry.key == key:
-                # if hash_entry is a tombstone, set it to False before updating
-                if hash_entry.is_tombstone:
-                    hash_entry.is_tombstone = False
-                    self._size += 1
-                # update its value and stop
-                hash_entry.value = value
-                return
+        while hash_entry is not None and j <= self._capacity:
+            # first check if current hash entry has the same key, comparing
+            # the stored hashes first to skip most other keys cheaply
+            if hash_entry.hash == hash and hash_entry.key == key:
+                found = True
+                break
+            if hash_entry.is_tombstone and reuse_index == -1:
+                reuse_index = new_index
             # otherwise, proceed with quadratic probing scheme
             new_index = (i_initial + (j * j)) % self._capacity
             j += 1
             hash_entry = self._buckets.get_at_index(new_index)
 
-        # at this point, we've arrived at an empty position
-        new_hash_entry = HashEntry(key, value)
-        self._buckets.set_at_index(new_index, new_hash_entry)
+        if self._stats is not None:
+            self._stats.record('put', min(j, self._capacity))
+
+        if found:
+            # an expired key is removed, callers then revive the slot
+            if self._is_expired(hash_entry):
+                self._bury(hash_entry)
+            return hash_entry, new_index
+        if reuse_index != -1:
+            return None, reuse_index
+        if hash_entry is None:
+            return None, new_index
+        # every position the probing sequence can reach is taken
+        return None, -1
+
+    def _insert(self, key: str, value: object, hash: int,
+                expires_at: float = None) -> None:
+        """
+        Puts the key/value pair into the table given the hash of the key,
+        without checking the load factor first.
+        """
+        hash_entry, index = self._probe(key, hash)
+        if hash_entry is None:
+            self._place(key, value, hash, index, expires_at)
+            return
+
+        # if hash_entry is a tombstone, set it to False before updating
+        if hash_entry.is_tombstone:
+            hash_entry.is_tombstone = False
+            self._size += 1
+            self._tombstones -= 1
+        # update its value and stop
+        hash_entry.value = value
+        hash_entry.expires_at = expires_at
+        return
+
+    def _place(self, key: str, value: object, hash: int, index: int,
+               expires_at: float = None) -> None:
+        """
+        Stores a key that is not in the hash map at the index found by
+        _probe().
+        """
+        if index == -1:
+            # no position was reachable, grow the table and try again
+            self.resize_table(self._capacity * 2)
+            self._insert(key, value, hash, expires_at)
+            return
+
+        # taking over a tombstone
+        if self._buckets.get_at_index(index) is not None:
+            self._tombstones -= 1
+
+        # at this point, we've arrived at an empty (or reusable) position
+        new_hash_entry = HashEntry(key, value, hash, expires_at)
+        self._buckets.set_at_index(index, new_hash_entry)
         self._size += 1
         return
 
+    def update_with(self, key: str, function, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by the result of
+        calling function on it, or on default if the key is not in the hash
+        map (in which case the key is added). Returns the new value.
+        The key is hashed and its probing sequence followed only once.
+        """
+        self._make_room()
+        hash = self._hash(key)
+        hash_entry, index = self._probe(key, hash)
+        if hash_entry is None:
+            value = function(default)
+            self._place(key, value, hash, index)
+            return value
+
+        if hash_entry.is_tombstone:
+            hash_entry.value = function(default)
+            hash_entry.is_tombstone = False
+            hash_entry.expires_at = None
+            self._size += 1
+            self._tombstones -= 1
+        else:
+            # the key keeps its time to live
+            hash_entry.value = function(hash_entry.value)
+        return hash_entry.value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, it is added with the default value, which is returned.
+        """
+        return self.update_with(key, _keep_value, default)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key from the hash map and returns the value that
+        was associated with it. If the key is not in the hash map, returns
+        default.
+        """
+        hash_entry = self._find_entry(key, self._hash(key), 'remove')
+        if hash_entry is None:
+            return default
+
+        self._bury(hash_entry)
+        return hash_entry.value
+
     def table_load(self) -> float:
         """
         Returns the current hash table load factor.
@@ -112,18 +350,56 @@ class HashMap:
         load_factor = self._size/self._capacity
         return load_factor
 
+    def effective_load(self) -> float:
+        """
+        Returns the load factor of the hash table counting tombstones as
+        occupied slots, since they lengthen probing sequences the same way
+        live entries do.
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones currently in the hash table.
+        """
+        return self._tombstones
+
     def empty_buckets(self) -> int:
         """
-        Returns the number of empty buckets in the hash table.
+        Returns the number of empty buckets in the hash table, in O(1) time.
         """
-        count = 0
+        # every slot that isn't empty holds either a key (expired keys
+        # included, until they are buried) or a tombstone
+        return self._capacity - self._size - self._tombstones
 
-        for index in range(self._capacity):
-            current_hash_entry = self._buckets.get_at_index(index)
-            if current_hash_entry is None:
-                count += 1
+    def set_instrumented(self, enabled: bool) -> None:
+        """
+        Starts (with fresh counters) or stops collecting statistics on probe
+        lengths, resizes and the hash function, see get_stats(). A map that
+        isn't instrumented only pays for checking that it isn't.
+        """
+        self._stats = HashMapStats() if enabled else None
+        self._bind_hash()
 
-        return count
+    def get_stats(self) -> dict:
+        """
+        Returns a dict describing the shape of the table: size, capacity,
+        load factors, empty buckets and tombstones. While instrumented it
+        also holds the collected counters, see
+        hash_map_stats.HashMapStats.as_dict().
+        """
+        stats = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'effective_load': self.effective_load(),
+            'empty_buckets': self.empty_buckets(),
+            'tombstones': self._tombstones,
+            'instrumented': self._stats is not None,
+        }
+        if self._stats is not None:
+            stats.update(self._stats.as_dict())
+        return stats
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -135,61 +411,146 @@ class HashMap:
         if new_capacity < 1 or new_capacity < self._size:
             return
 
-        # get_keys() only returns non-tombstone hash entries
-        keys_to_append = self.get_keys()
-        values_to_append = DynamicArray()
-        # generating an array of value pairs to put() in the hashmap later
-        for index in range(keys_to_append.length()):
-            current_key = keys_to_append.get_at_index(index)
-            values_to_append.append(self.get(current_key))
+        if self._stats is not None:
+            start = time.perf_counter()
+
+        # every slot is visited anyway, so expired keys are dropped now
+        # rather than carried over
+        if self._has_ttl:
+            self.sweep(self._capacity)
 
-        new_da = DynamicArray()
-        # initialize new da with None objects
-        for i in range(new_capacity):
-            new_da.append(None)
+        # size the new table once up front so that the moved entries keep the
+        # load factor below 0.5, rather than re-checking it on every insert
+        while self._size / new_capacity >= 0.5:
+            new_capacity *= 2
+
+        new_da = self._rehashed_buckets(new_capacity)
+        # quadratic probing can't always reach every empty position, so if
+        # an entry couldn't be placed, keep doubling until they all fit
+        while new_da is None:
+            new_capacity *= 2
+            new_da = self._rehashed_buckets(new_capacity)
 
         self._buckets = new_da
         self._capacity = new_capacity
-        self._size = 0
-
-        # we grab the value to each key from the old array and call
-        # put() to rehash the key/value pair into the resized hash map
-        for index in range(keys_to_append.length()):
-            self.put(keys_to_append.get_at_index(index), values_to_append.get_at_index(index))
+        self._tombstones = 0
+        self._sweep_index = 0
 
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - start)
         return
 
-    def get(self, key: str) -> object:
+    def _rehashed_buckets(self, new_capacity: int) -> DynamicArray:
         """
-        Returns the value associated with the given key. If the key is not in
-        the hash map, returns None.
+        Returns a new DynamicArray of the given capacity holding every live
+        hash entry of the table, or None if one of them could not be placed.
         """
-        # running key through hash function
-        i_initial = self._hash_function(key) % self._capacity
+        # walk the old buckets once, moving every live hash entry into the
+        # new array. Tombstones are dropped.
+        live = []
+        for index in range(self._capacity):
+            hash_entry = self._buckets.get_at_index(index)
+            if hash_entry is not None and not hash_entry.is_tombstone:
+                live.append(hash_entry)
+        return self._placed_buckets(live, new_capacity)
+
+    @staticmethod
+    def _placed_buckets(entries: list, capacity: int) -> DynamicArray:
+        """
+        Returns a new DynamicArray of the given capacity holding the given
+        hash entries, or None if one of them could not be placed.
+        """
+        new_da = DynamicArray([None] * capacity, copy=False)
+
+        # the hashes stored in the entries are used so that no key is hashed
+        # again. Keys are already unique, so we only need to probe for the
+        # first empty position, and there is no load factor check since the
+        # caller picked the capacity.
+        for hash_entry in entries:
+            i_initial = hash_entry.hash % capacity
+            new_index = i_initial
+            j = 1
+            while new_da.get_at_index(new_index) is not None:
+                if j > capacity:
+                    return None
+                new_index = (i_initial + (j * j)) % capacity
+                j += 1
+            new_da.set_at_index(new_index, hash_entry)
+
+        return new_da
+
+    def _find_entry(self, key: str, hash: int,
+                    operation: str = 'get') -> HashEntry:
+        """
+        Returns the live hash entry holding the given key, or None if the key
+        is not in the hash map. If the map is instrumented, the number of
+        slots examined is recorded for the given operation ('get' or
+        'remove').
+        """
+        i_initial = hash % self._capacity
         # getting hash_entry at index
         hash_entry = self._buckets.get_at_index(i_initial)
 
-        # if empty at i_initial, key is not in hash map, return None
-        if hash_entry is None:
-            return None
-
-        # otherwise, start search for given key by computing next index
-        # in the probing sequence
+        # start search for given key by computing next index in the probing
+        # sequence, until we reach an empty position
         j = 1
-        while hash_entry is not None:
+        while hash_entry is not None and j <= self._capacity:
             # first check if current hash entry has the same key
-            if hash_entry.key == key:
-                # if hash_entry is not a tombstone, return value
-                if not hash_entry.is_tombstone:
-                    return hash_entry.value
+            if hash_entry.hash == hash and hash_entry.key == key:
+                break
 
             # otherwise, proceed with quadratic probing scheme
             new_index = (i_initial + (j * j)) % self._capacity
             j += 1
             hash_entry = self._buckets.get_at_index(new_index)
+        else:
+            # at this point, key is not in the hash map
+            hash_entry = None
+
+        if self._stats is not None:
+            self._stats.record(operation, min(j, self._capacity))
+
+        # a tombstone means the key was removed
+        if hash_entry is None or hash_entry.is_tombstone:
+            return None
+        # an expired key is removed as soon as it is looked up
+        if self._is_expired(hash_entry):
+            self._bury(hash_entry)
+            return None
+        return hash_entry
+
+    def _bind_hash(self) -> None:
+        """
+        Sets _hash(), which runs a key through the hash function: the hash
+        function itself while the map isn't instrumented, so that hashing
+        costs no more than calling it, and a wrapper timing every call
+        otherwise.
+        """
+        if self._stats is None:
+            self._hash = self._hash_function
+        else:
+            self._hash = functools.partial(self._stats.timed_hash,
+                                           self._hash_function)
+
+    def _hash_many(self, keys: list):
+        """
+        Returns the hashes of a list of keys, see hash_keys(), timing them if
+        the map is instrumented.
+        """
+        if self._stats is None:
+            return hash_keys(self._hash_function, keys)
+        return self._stats.timed_hash_keys(self._hash_function, keys)
 
-        # at this point, key is not in the hash map
-        return None
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        # running key through hash function
+        hash_entry = self._find_entry(key, self._hash(key))
+        if hash_entry is None:
+            return None
+        return hash_entry.value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -200,31 +561,7 @@ class HashMap:
             return False
 
         # running key through hash function
-        i_initial = self._hash_function(key) % self._capacity
-        # getting hash_entry at index
-        hash_entry = self._buckets.get_at_index(i_initial)
-
-        # if empty at i_initial, key is not in hash map, return False
-        if hash_entry is None:
-            return False
-
-        # otherwise, start search for given key by computing next index
-        # in the probing sequence
-        j = 1
-        while hash_entry is not None:
-            # first check if current hash entry has the same key
-            if hash_entry.key == key:
-                # if hash_entry is not a tombstone, return True
-                if not hash_entry.is_tombstone:
-                    return True
-
-            # otherwise, proceed with quadratic probing scheme
-            new_index = (i_initial + (j * j)) % self._capacity
-            j += 1
-            hash_entry = self._buckets.get_at_index(new_index)
-
-        # at this point, key is not in the hash map
-        return False
+        return self._find_entry(key, self._hash(key)) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -232,70 +569,251 @@ class HashMap:
         If the key is not in the hash map, nothing happens.
         """
         # running key through hash function
-        i_initial = self._hash_function(key) % self._capacity
-        # getting hash_entry at index
-        hash_entry = self._buckets.get_at_index(i_initial)
-
-        # if empty at i_initial, key is not in hash map, nothing happens
+        hash_entry = self._find_entry(key, self._hash(key), 'remove')
         if hash_entry is None:
             return
 
-        # otherwise, start search for given key by computing next index
-        # in the probing sequence
-        j = 1
-        while hash_entry is not None:
-            # first check if current hash entry has the same key
-            if hash_entry.key == key:
-                # check to see if tombstone, if so, nothing happens
-                if hash_entry.is_tombstone:
-                    return
-                else:
-                    # remove the entry by updating the tombstone to True
-                    hash_entry.is_tombstone = True
-                    # decrement size
-                    self._size -= 1
-                    return
-            # otherwise, proceed with quadratic probing scheme
-            new_index = (i_initial + (j * j)) % self._capacity
-            j += 1
-            hash_entry = self._buckets.get_at_index(new_index)
+        self._bury(hash_entry)
+        return
 
-        # at this point, we've arrived at an empty position. We know the key
-        # is not in the hash map
+    def _bury(self, hash_entry: HashEntry) -> None:
+        """
+        Removes a live hash entry from the hash map by turning it into a
+        tombstone.
+        """
+        # remove the entry by updating the tombstone to True
+        hash_entry.is_tombstone = True
+        self._size -= 1
+        self._tombstones += 1
         return
 
+    def expire(self, key: str, ttl: float) -> bool:
+        """
+        Sets the time to live of the given key to ttl seconds from now, or
+        removes its time to live if ttl is None. Returns False if the key is
+        not in the hash map.
+        """
+        hash_entry = self._find_entry(key, self._hash(key))
+        if hash_entry is None:
+            return False
+        hash_entry.expires_at = self._expiry(ttl)
+        return True
+
+    def get_ttl(self, key: str) -> float:
+        """
+        Returns the number of seconds the given key has left to live, or None
+        if the key never expires or is not in the hash map.
+        """
+        hash_entry = self._find_entry(key, self._hash(key))
+        if hash_entry is None or hash_entry.expires_at is None:
+            return None
+        return hash_entry.expires_at - self._clock()
+
+    def sweep(self, slots: int = SWEEP_SLOTS) -> int:
+        """
+        Examines the given number of slots, continuing where the previous
+        call stopped and wrapping around at the end of the table, and
+        removes the expired keys found there. Returns the number of keys
+        removed. The cost is bounded by slots, however many keys expired.
+        """
+        if not self._has_ttl:
+            return 0
+
+        now = self._clock()
+        removed = 0
+        index = self._sweep_index
+        for _ in range(min(slots, self._capacity)):
+            hash_entry = self._buckets.get_at_index(index)
+            if (hash_entry is not None and not hash_entry.is_tombstone
+                    and hash_entry.expires_at is not None
+                    and hash_entry.expires_at <= now):
+                self._bury(hash_entry)
+                removed += 1
+            index += 1
+            if index == self._capacity:
+                index = 0
+        self._sweep_index = index
+        return removed
+
     def clear(self) -> None:
         """
         Clears the contents of the hash map.
         """
-        new_da = DynamicArray()
-        for bucket in range(self._capacity):
-            new_da.append(None)
-        self._buckets = new_da
+        self._buckets = DynamicArray([None] * self._capacity, copy=False)
         self._size = 0
+        self._tombstones = 0
+        self._sweep_index = 0
         return
 
+    def _live_entries(self):
+        """
+        Generator over the live hash entries of the table, in bucket order.
+        Expired keys are skipped (but not removed, so the generator never
+        changes the table).
+        """
+        now = self._clock() if self._has_ttl else None
+        buckets = self._buckets
+        for index in range(buckets.length()):
+            hash_entry = buckets.get_at_index(index)
+            if hash_entry is None or hash_entry.is_tombstone:
+                continue
+            if (now is not None and hash_entry.expires_at is not None
+                    and hash_entry.expires_at <= now):
+                continue
+            yield hash_entry
+
     def get_keys(self) -> DynamicArray:
         """
         Returns a DynamicArray that contains all the keys stored in the hash
         map. Order does not matter.
         """
         result_da = DynamicArray()
-        for index in range(self._capacity):
-            current_hash_entry = self._buckets.get_at_index(index)
-            if current_hash_entry is not None:
-                # only add key to result_da if not a tombstone
-                if not current_hash_entry.is_tombstone:
-                    current_key = current_hash_entry.key
-                    result_da.append(current_key)
+        # tombstones and expired keys are skipped
+        for hash_entry in self._live_entries():
+            result_da.append(hash_entry.key)
 
         return result_da
 
+    def keys(self):
+        """
+        Generator over the keys stored in the hash map, walking the buckets
+        directly instead of building an array first. Empty positions,
+        tombstones and expired keys are skipped. Order does not matter.
+        The hash map must not be modified while the generator is in use.
+        """
+        for hash_entry in self._live_entries():
+            yield hash_entry.key
+
+    def values(self):
+        """
+        Generator over the values stored in the hash map, in the same order
+        as keys().
+        """
+        for hash_entry in self._live_entries():
+            yield hash_entry.value
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs stored in the hash map, in the
+        same order as keys().
+        """
+        for hash_entry in self._live_entries():
+            yield hash_entry.key, hash_entry.value
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of the given iterable into the hash map,
+        same as calling put() for each of them. The table is resized at most
+        once, up front, so that the whole batch fits.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return
+
+        # assume every distinct key of the batch is new, so the load factor
+        # stays below 0.5 for the whole batch and no put needs to check it.
+        # Repeated keys are only counted once, they don't take more room.
+        keys = [key for key, _ in pairs]
+        self._reserve(len(set(keys)))
+
+        hashes = self._hash_many(keys)
+        insert = self._insert
+        for (key, value), hash in zip(pairs, hashes):
+            insert(key, value, hash)
+        return
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes the table, at most once, so that count more keys fit below a
+        load factor of 0.5, counting tombstones.
+        """
+        needed = self._size + count
+        if (needed + self._tombstones) / self._capacity >= 0.5:
+            new_capacity = self._capacity
+            while needed / new_capacity >= 0.5:
+                new_capacity *= 2
+            self.resize_table(new_capacity)
+        return
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value associated with each key of the
+        given iterable, in the same order. Keys that are not in the hash map
+        get None.
+        """
+        keys = list(keys)
+        hashes = self._hash_many(keys)
+        find_entry = self._find_entry
+        values = []
+        for key, hash in zip(keys, hashes):
+            hash_entry = find_entry(key, hash)
+            values.append(None if hash_entry is None else hash_entry.value)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of the given iterable from the hash map. Keys that
+        are not in the hash map are ignored.
+        """
+        keys = list(keys)
+        hashes = self._hash_many(keys)
+        find_entry = self._find_entry
+        for key, hash in zip(keys, hashes):
+            hash_entry = find_entry(key, hash, 'remove')
+            if hash_entry is not None:
+                self._bury(hash_entry)
+        return
+
+    def dump(self, path: str) -> None:
+        """
+        Writes a binary snapshot of the hash map to path, see load().
+        Tombstones and expired keys are left out, and the keys are saved
+        without their time to live, since the clock it is measured with is
+        local to the process. Raises ValueError if the hash function is not
+        one of a6_include.HASH_FUNCTION_IDS.
+        """
+        keys, values, hashes = [], [], []
+        for hash_entry in self._live_entries():
+            keys.append(hash_entry.key)
+            values.append(hash_entry.value)
+            hashes.append(hash_entry.hash)
+
+        write_snapshot(path, b'OA', self._hash_function, self._capacity,
+                       keys, values, hashes)
+
+    @classmethod
+    def load(cls, path: str) -> "HashMap":
+        """
+        Returns a new HashMap restored from a snapshot written by dump(), at
+        the capacity it had. Every entry is placed using the saved hash,
+        with no resizing along the way.
+        """
+        function, capacity, keys, values, hashes, _ = read_snapshot(path, b'OA')
+        entries = [HashEntry(key, value, hash)
+                   for key, value, hash in zip(keys, values, hashes)]
+
+        hash_map = cls(0, function)
+        buckets = cls._placed_buckets(entries, capacity)
+        # placing the entries in a different order than they were put in
+        # can, rarely, leave one unreachable; grow as resize_table() does
+        while buckets is None:
+            capacity *= 2
+            buckets = cls._placed_buckets(entries, capacity)
+
+        hash_map._buckets = buckets
+        hash_map._capacity = capacity
+        hash_map._size = len(entries)
+        return hash_map
+
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
 
+    import os
+    import random
+    import tempfile
+
     print("\nPDF - put example 1")
     print("-------------------")
     m = HashMap(50, hash_function_1)
@@ -480,3 +998,91 @@ if __name__ == "__main__":
     m.remove('100')
     m.resize_table(2)
     print(m.get_keys())
+
+    print("\nkeys / values / items example 1")
+    print("-------------------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(100, 200, 10):
+        m.put(str(i), i * 10)
+    m.remove('150')
+    print(sorted(m.keys()))
+    print(sum(m.values()))
+    print(all(m.get(key) == value for key, value in m.items()))
+
+    print("\ndump / load example")
+    print("-------------------")
+    m = HashMap(20, hash_function_1)
+    for i in range(100):
+        m.put('key' + str(i), [i])
+    for i in range(0, 100, 3):
+        m.remove('key' + str(i))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot')
+        m.dump(path)
+        restored = HashMap.load(path)
+    print(restored.get_size(), restored.get_capacity(), restored.tombstone_count(),
+          dict(restored.items()) == dict(m.items()), restored.get('key1'))
+
+    print("\nTTL example")
+    print("-----------")
+    now = [0.0]
+    m = HashMap(10, hash_function_1, clock=lambda: now[0])
+    for i in range(20):
+        m.put('session' + str(i), i, ttl=10 if i % 2 else None)
+    m.put('short', 'lived', ttl=1)
+    now[0] = 5.0
+    print(m.get('short'), m.contains_key('session1'), m.get_ttl('session1'), m.get_size())
+    now[0] = 10.0
+    # expired keys are absent right away, and reclaimed a few slots at a time
+    print(m.get('session1'), m.contains_key('session2'), m.get_keys().length(), m.get_size())
+    while m.get_size() > 10:
+        m.sweep(8)
+    print(m.get_size(), m.tombstone_count(), m.expire('session2', 1), m.get_ttl('session2'))
+
+    print("\nstats example")
+    print("-------------")
+    m = HashMap(10, hash_function_1, instrument=True)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    m.put_many(('key' + str(i), i) for i in range(50, 100))
+    for i in range(100):
+        m.get('key' + str(i))
+    m.get_many('key' + str(i) for i in range(100, 200))
+    for i in range(0, 100, 2):
+        m.remove('key' + str(i)) if i % 4 else m.pop('key' + str(i))
+    m.update_with('key1', str)
+    stats = m.get_stats()
+    print(stats['size'], stats['capacity'], stats['tombstones'], stats['resizes'],
+          stats['hash_calls'], {op: s['calls'] for op, s in stats['operations'].items()})
+    print(stats['operations']['get']['max_probes'], stats['operations']['get']['histogram'])
+    m.set_instrumented(False)
+    print(m.get_stats()['instrumented'])
+
+    print("\nempty_buckets counter example")
+    print("-----------------------------")
+    # the O(1) count must always agree with a scan of the table
+    rnd = random.Random(261)
+    now = [0.0]
+    m = HashMap(7, hash_function_2, clock=lambda: now[0])
+    result = True
+    for n in range(20000):
+        key = 'key' + str(rnd.randrange(500))
+        operation = rnd.random()
+        if operation < 0.4:
+            m.put(key, n, ttl=rnd.choice((None, None, 5)))
+        elif operation < 0.7:
+            m.remove(key)
+        elif operation < 0.8:
+            m.pop(key)
+        elif operation < 0.9:
+            m.setdefault(key, n)
+        elif operation < 0.998:
+            now[0] += 0.1
+            m.get(key)
+        elif operation < 0.999:
+            m.resize_table(rnd.randrange(1, 2000))
+        else:
+            m.clear()
+        scan = sum(m._buckets.get_at_index(i) is None for i in range(m.get_capacity()))
+        result &= m.empty_buckets() == scan
+    print(result, m.get_size(), m.get_capacity(), m.tombstone_count())
@@ -9,33 +9,68 @@
 #              pairs being stored in linked list nodes.
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import functools
+import heapq
+import itertools
+import time
+from array import array
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
+                        hash_function_1, hash_function_2, hash_function_mix)
+from hash_map_snapshot import read_snapshot, write_snapshot
+from hash_map_stats import HashMapStats
+from hash_vectorized import hash_keys
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 max_load: float = 1.0, min_load: float = 0.25,
+                 instrument: bool = False) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        The table doubles its capacity when a put() pushes the load factor
+        above max_load, and halves it (never below the initial capacity, or
+        the capacity last passed to resize_table()) when a remove() drops
+        the load factor below min_load. Pass None for
+        either threshold to turn that direction off.
+        If instrument is True, statistics are collected, see get_stats().
         """
+        # shrinking must leave the load factor well below the growth
+        # threshold, otherwise alternating put/remove calls could resize
+        # the table on every operation
+        if (max_load is not None and min_load is not None
+                and min_load * 2 >= max_load):
+            raise ValueError("min_load must be less than half of max_load")
+
+        # buckets start out as None and only get a linked list once a key is
+        # put in them, so a large, sparse table doesn't pay for empty lists
         self._buckets = DynamicArray()
         for _ in range(capacity):
-            self._buckets.append(LinkedList())
+            self._buckets.append(None)
 
         self._capacity = capacity
         self._hash_function = function
         self._size = 0
+        # number of buckets holding at least one node, kept up to date by
+        # _add() and _unlinked() so empty_buckets() doesn't scan the table
+        self._occupied = 0
+        self._max_load = max_load
+        self._min_load = min_load
+        self._min_capacity = capacity
+
+        # HashMapStats while instrumented, None otherwise
+        self._stats = HashMapStats() if instrument else None
+        self._bind_hash()
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
         out = ''
         for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+            bucket = self._buckets[i]
+            out += str(i) + ': ' + str(bucket or LinkedList()) + '\n'
         return out
 
     def get_size(self) -> int:
@@ -61,35 +96,171 @@ class HashMap:
         new value. If the given key is not in the hash map, a key/value pair
         is added.
         """
-        # running key through hash function
-        hash_index = self._hash_function(key) % self._capacity
-        # getting linked list at index
-        linked_list = self._buckets.get_at_index(hash_index)
+        # running key through hash function, the full hash is kept in the
+        # node so the key never has to be hashed again
+        self._insert(key, value, self._hash(key))
+        self._grow_if_full()
+        return
+
+    def _grow_if_full(self) -> None:
+        """
+        Doubles the table if the load factor is above max_load. Doubling
+        keeps the cost of growing amortized O(1) per insert.
+        """
+        if (self._max_load is not None
+                and self._size > self._max_load * self._capacity):
+            self._rehash(self._capacity * 2)
+        return
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Puts the key/value pair into its bucket given the hash of the key,
+        without checking the load factor.
+        """
+        # getting linked list at index, creating it on first use
+        linked_list = self._bucket_for(hash)
 
-        # iterate through sll at index
-        for node in linked_list:
-            # if given key already exists, update its value
-            if node.key == key:
-                node.value = value
-                return
-        # we've iterated through the linked list, if we haven't returned,
-        # the key is not in the hash map
-        linked_list.insert(key, value)
+        # if given key already exists, update its value
+        node = self._search(linked_list, key, hash, 'put')
+        if node is not None:
+            node.value = value
+            return
+        # otherwise the key is not in the hash map
+        self._add(linked_list, SLNode(key, value, hash=hash))
+        return
+
+    def _search(self, linked_list: LinkedList, key: str, hash: int,
+                operation: str) -> SLNode:
+        """
+        Returns the node of the given linked list holding the given key, or
+        None. If the map is instrumented, the number of nodes examined is
+        recorded for the given operation ('get' or 'put').
+        """
+        # comparing the stored hashes first skips most non-matching keys
+        # cheaply
+        node, probes = linked_list.find_counted(key, hash)
+        if self._stats is not None:
+            self._stats.record(operation, probes)
+        return node
+
+    def _add(self, linked_list: LinkedList, node: SLNode) -> None:
+        """
+        Links a node holding a key that is not in the hash map into the given
+        bucket, without checking the load factor.
+        """
+        if linked_list.length() == 0:
+            self._occupied += 1
+        linked_list.insert_node(node)
         self._size += 1
         return
 
-    def empty_buckets(self) -> int:
+    def _unlinked(self, linked_list: LinkedList) -> None:
         """
-        Returns the number of empty buckets in the hash table.
+        Accounts for a node that was just removed from the given bucket.
         """
-        count = 0
+        self._size -= 1
+        if linked_list.length() == 0:
+            self._occupied -= 1
+        return
 
-        for index in range(self._capacity):
-            current_bucket = self._buckets.get_at_index(index)
-            if current_bucket.length() == 0:
-                count += 1
+    def _bucket_for(self, hash: int) -> LinkedList:
+        """
+        Returns the linked list of the bucket the given hash maps to,
+        creating it on first use.
+        """
+        hash_index = hash % self._capacity
+        linked_list = self._buckets.get_at_index(hash_index)
+        if linked_list is None:
+            linked_list = LinkedList()
+            self._buckets.set_at_index(hash_index, linked_list)
+        return linked_list
 
-        return count
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds amount to the value associated with the given key, treating a
+        key that is not in the hash map as 0, and returns the new value.
+        The key is hashed and its bucket searched only once.
+        """
+        return self._increment(key, self._hash(key), amount)
+
+    def _increment(self, key: str, hash: int, amount: int) -> int:
+        """
+        increment() given the hash of the key.
+        """
+        linked_list = self._bucket_for(hash)
+
+        node = self._search(linked_list, key, hash, 'put')
+        if node is not None:
+            node.value += amount
+            return node.value
+
+        self._add(linked_list, SLNode(key, amount, hash=hash))
+        self._grow_if_full()
+        return amount
+
+    def update_with(self, key: str, function, default: object = None) -> object:
+        """
+        Replaces the value associated with the given key by the result of
+        calling function on it, or on default if the key is not in the hash
+        map (in which case the key is added). Returns the new value.
+        The key is hashed and its bucket searched only once.
+        """
+        return self._update_with(key, self._hash(key), function, default)
+
+    def _update_with(self, key: str, hash: int, function,
+                     default: object) -> object:
+        """
+        update_with() given the hash of the key.
+        """
+        linked_list = self._bucket_for(hash)
+        node = self._search(linked_list, key, hash, 'put')
+        if node is not None:
+            node.value = function(node.value)
+            return node.value
+
+        value = function(default)
+        self._add(linked_list, SLNode(key, value, hash=hash))
+        self._grow_if_full()
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, it is added with the default value, which is returned.
+        """
+        return self._setdefault(key, self._hash(key), default)
+
+    def _setdefault(self, key: str, hash: int, default: object) -> object:
+        """
+        setdefault() given the hash of the key.
+        """
+        linked_list = self._bucket_for(hash)
+        node = self._search(linked_list, key, hash, 'put')
+        if node is not None:
+            return node.value
+
+        self._add(linked_list, SLNode(key, default, hash=hash))
+        self._grow_if_full()
+        return default
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key from the hash map and returns the value that
+        was associated with it. If the key is not in the hash map, returns
+        default.
+        """
+        node = self._take(key, self._hash(key))
+        if node is None:
+            return default
+
+        self._shrink_if_sparse()
+        return node.value
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table, in O(1) time.
+        """
+        return self._capacity - self._occupied
 
     def table_load(self) -> float:
         """
@@ -98,15 +269,52 @@ class HashMap:
         load_factor = self._size/self._capacity
         return load_factor
 
+    def set_instrumented(self, enabled: bool) -> None:
+        """
+        Starts (with fresh counters) or stops collecting statistics on probe
+        lengths, resizes and the hash function, see get_stats(). A map that
+        isn't instrumented only pays for checking that it isn't.
+        """
+        self._stats = HashMapStats() if enabled else None
+        self._bind_hash()
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dict describing the shape of the table: size, capacity,
+        load factor, empty buckets and the longest and mean (non-empty)
+        chain. While instrumented it also holds the collected counters, see
+        hash_map_stats.HashMapStats.as_dict().
+        Only the longest chain takes a scan of the table.
+        """
+        longest = 0
+        for index in range(self._capacity):
+            bucket = self._buckets.get_at_index(index)
+            if bucket is not None:
+                longest = max(longest, bucket.length())
+
+        stats = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'table_load': self.table_load(),
+            'empty_buckets': self.empty_buckets(),
+            'max_chain': longest,
+            'mean_chain': self._size / self._occupied if self._occupied else 0.0,
+            'instrumented': self._stats is not None,
+        }
+        if self._stats is not None:
+            stats.update(self._stats.as_dict())
+        return stats
+
     def clear(self) -> None:
         """
         Clears the contents of the hash map.
         """
         new_da = DynamicArray()
         for bucket in range(self._capacity):
-            new_da.append(LinkedList())
+            new_da.append(None)
         self._buckets = new_da
         self._size = 0
+        self._occupied = 0
         return
 
     def resize_table(self, new_capacity: int) -> None:
@@ -117,46 +325,97 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        keys_to_append = self.get_keys()
-        values_to_append = DynamicArray()
-        # generating an array of value pairs to put() in the hashmap later
-        for index in range(keys_to_append.length()):
-            current_key = keys_to_append.get_at_index(index)
-            values_to_append.append(self.get(current_key))
+        # an explicitly chosen capacity is never shrunk away automatically
+        self._min_capacity = new_capacity
+        self._rehash(new_capacity)
+        return
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every node into a new table of the given capacity.
+        """
+        if self._stats is not None:
+            start = time.perf_counter()
 
         new_da = DynamicArray()
-        # populate new da with empty sll's
+        # buckets are created lazily, as in __init__
         for i in range(new_capacity):
-            new_da.append(LinkedList())
+            new_da.append(None)
+
+        # walk the old buckets once, relinking every existing node into its
+        # new bucket. Nodes are moved rather than re-created, their stored
+        # hashes mean no key is hashed again, and since keys are already
+        # unique there is no need to search the new chains.
+        # (the sll iterator steps past a node before handing it out, so
+        # relinking the current node doesn't disturb the iteration)
+        occupied = 0
+        for index in range(self._capacity):
+            old_bucket = self._buckets.get_at_index(index)
+            if old_bucket is None:
+                continue
+            for node in old_bucket:
+                hash_index = node.hash % new_capacity
+                new_bucket = new_da.get_at_index(hash_index)
+                if new_bucket is None:
+                    new_bucket = LinkedList()
+                    new_da.set_at_index(hash_index, new_bucket)
+                    occupied += 1
+                new_bucket.insert_node(node)
 
         self._buckets = new_da
         self._capacity = new_capacity
-        self._size = 0
-
-        # we grab the value to each key from the old array and call
-        # put() to rehash the key/value pair into the resized hash map
-        for index in range(keys_to_append.length()):
-            self.put(keys_to_append.get_at_index(index), values_to_append.get_at_index(index))
+        self._occupied = occupied
 
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - start)
         return
 
+    def _find_node(self, key: str, hash: int) -> SLNode:
+        """
+        Returns the node holding the given key, or None if the key is not in
+        the hash map.
+        """
+        # getting linked list at index
+        linked_list = self._buckets.get_at_index(hash % self._capacity)
+        if linked_list is None:
+            if self._stats is not None:
+                self._stats.record('get', 0)
+            return None
+
+        return self._search(linked_list, key, hash, 'get')
+
+    def _bind_hash(self) -> None:
+        """
+        Sets _hash(), which runs a key through the hash function: the hash
+        function itself while the map isn't instrumented, so that hashing
+        costs no more than calling it, and a wrapper timing every call
+        otherwise.
+        """
+        if self._stats is None:
+            self._hash = self._hash_function
+        else:
+            self._hash = functools.partial(self._stats.timed_hash,
+                                           self._hash_function)
+
+    def _hash_many(self, keys: list):
+        """
+        Returns the hashes of a list of keys, see hash_keys(), timing them if
+        the map is instrumented.
+        """
+        if self._stats is None:
+            return hash_keys(self._hash_function, keys)
+        return self._stats.timed_hash_keys(self._hash_function, keys)
+
     def get(self, key: str) -> object:
         """
         Returns the value associated with the given key. If the key is not in
         the hash map, returns None.
         """
         # running key through hash function
-        hash_index = self._hash_function(key) % self._capacity
-        # getting linked list at index
-        linked_list = self._buckets.get_at_index(hash_index)
-
-        # iterate through sll at index
-        for node in linked_list:
-            # if given key exists, return value
-            if node.key == key:
-                return node.value
-        # at this point, we know the key is not in the hash map
-        return None
+        node = self._find_node(key, self._hash(key))
+        if node is None:
+            return None
+        return node.value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -167,34 +426,58 @@ class HashMap:
             return False
 
         # running key through hash function
-        hash_index = self._hash_function(key) % self._capacity
-        # getting linked list at index
-        linked_list = self._buckets.get_at_index(hash_index)
-
-        # iterate through sll at index
-        for node in linked_list:
-            # if given key already exists, update its value
-            if node.key == key:
-                return True
-        # at this point, we know the key is not in the hash map
-        return False
+        return self._find_node(key, self._hash(key)) is not None
 
     def remove(self, key: str) -> None:
         """
         Removes the given key and its associated value from the hash map.
         """
         # running key through hash function
-        hash_index = self._hash_function(key) % self._capacity
+        if self._remove(key, self._hash(key)):
+            self._shrink_if_sparse()
+        return
+
+    def _remove(self, key: str, hash: int) -> bool:
+        """
+        Removes the given key given its hash, without checking the load
+        factor. Returns True if the key was in the hash map.
+        """
+        return self._take(key, hash) is not None
+
+    def _take(self, key: str, hash: int) -> SLNode:
+        """
+        Unlinks the node holding the given key given its hash and returns
+        it, or None if the key is not in the hash map. Doesn't check the
+        load factor.
+        """
         # getting linked list at index
-        linked_list = self._buckets.get_at_index(hash_index)
+        linked_list = self._buckets.get_at_index(hash % self._capacity)
+        if linked_list is None:
+            node, probes = None, 0
+        else:
+            node, probes = linked_list.remove_counted(key, hash)
+            if node is not None:
+                self._unlinked(linked_list)
 
-        # sll remove() method returns True if node was found and removed.
-        # returns False otherwise
-        node_was_removed = linked_list.remove(key)
+        if self._stats is not None:
+            self._stats.record('remove', probes)
+        return node
 
-        if node_was_removed:
-            self._size -= 1
+    def _shrink_if_sparse(self) -> None:
+        """
+        Halves the table, as many times as needed, while the load factor is
+        below min_load, without going under the minimum capacity.
+        """
+        if self._min_load is None:
+            return
 
+        new_capacity = self._capacity
+        while (new_capacity > self._min_capacity
+               and self._size < self._min_load * new_capacity):
+            new_capacity = max(new_capacity // 2, self._min_capacity)
+
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
         return
 
     def get_keys(self) -> DynamicArray:
@@ -205,70 +488,320 @@ class HashMap:
         result_da = DynamicArray()
         for index in range(self._capacity):
             current_sll = self._buckets.get_at_index(index)
+            if current_sll is None:
+                continue
             for node in current_sll:
                 result_da.append(node.key)
 
         return result_da
 
+    def keys(self):
+        """
+        Generator over the keys stored in the hash map, walking the buckets
+        directly instead of building an array first. Order does not matter.
+        The hash map must not be modified while the generator is in use.
+        """
+        buckets = self._buckets
+        for index in range(buckets.length()):
+            bucket = buckets.get_at_index(index)
+            if bucket is not None:
+                for node in bucket:
+                    yield node.key
+
+    def values(self):
+        """
+        Generator over the values stored in the hash map, in the same order
+        as keys().
+        """
+        buckets = self._buckets
+        for index in range(buckets.length()):
+            bucket = buckets.get_at_index(index)
+            if bucket is not None:
+                for node in bucket:
+                    yield node.value
+
+    def items(self):
+        """
+        Generator over the (key, value) pairs stored in the hash map, in the
+        same order as keys().
+        """
+        buckets = self._buckets
+        for index in range(buckets.length()):
+            bucket = buckets.get_at_index(index)
+            if bucket is not None:
+                for node in bucket:
+                    yield node.key, node.value
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) pair of the given iterable into the hash map,
+        same as calling put() for each of them. The table is grown at most
+        once, up front, so that the whole batch fits under max_load.
+        """
+        pairs = list(pairs)
+        keys = [key for key, _ in pairs]
+
+        # assume every distinct key of the batch is new, so no put needs to
+        # check the load factor. Repeated keys are only counted once.
+        self._reserve(len(set(keys)))
+
+        hashes = self._hash_many(keys)
+        insert = self._insert
+        for (key, value), hash in zip(pairs, hashes):
+            insert(key, value, hash)
+        return
+
+    def _reserve(self, count: int) -> None:
+        """
+        Grows the table, at most once, so that count more keys fit under
+        max_load. Unlike resize_table(), this doesn't change the capacity
+        the table may shrink back to.
+        """
+        if self._max_load is None:
+            return
 
-def find_mode(da: DynamicArray) -> (DynamicArray, int):
+        needed = self._size + count
+        new_capacity = self._capacity
+        while needed > self._max_load * new_capacity:
+            new_capacity *= 2
+        if new_capacity != self._capacity:
+            self._rehash(new_capacity)
+        return
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value associated with each key of the
+        given iterable, in the same order. Keys that are not in the hash map
+        get None.
+        """
+        keys = list(keys)
+        hashes = self._hash_many(keys)
+        find_node = self._find_node
+        values = []
+        for key, hash in zip(keys, hashes):
+            node = find_node(key, hash)
+            values.append(None if node is None else node.value)
+        return DynamicArray(values)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key of the given iterable from the hash map. Keys that
+        are not in the hash map are ignored. The table is shrunk at most once,
+        after the whole batch.
+        """
+        keys = list(keys)
+        hashes = self._hash_many(keys)
+        remove = self._remove
+        for key, hash in zip(keys, hashes):
+            remove(key, hash)
+        self._shrink_if_sparse()
+        return
+
+    def dump(self, path: str) -> None:
+        """
+        Writes a binary snapshot of the hash map to path, see load().
+        Raises ValueError if the hash function is not one of
+        a6_include.HASH_FUNCTION_IDS.
+        """
+        keys, values, hashes = [], [], []
+        for index in range(self._capacity):
+            bucket = self._buckets.get_at_index(index)
+            if bucket is not None:
+                for node in bucket:
+                    keys.append(node.key)
+                    values.append(node.value)
+                    hashes.append(node.hash)
+
+        write_snapshot(path, b'SC', self._hash_function, self._capacity,
+                       keys, values, hashes,
+                       (self._max_load, self._min_load, self._min_capacity))
+
+    @classmethod
+    def load(cls, path: str) -> "HashMap":
+        """
+        Returns a new HashMap restored from a snapshot written by dump(), at
+        the capacity it had. Every node goes straight into its bucket using
+        the saved hash, with no resizing along the way.
+        """
+        function, capacity, keys, values, hashes, extra = read_snapshot(path, b'SC')
+        max_load, min_load, min_capacity = extra
+
+        hash_map = cls(0, function, max_load, min_load)
+        buckets = [None] * capacity
+        for key, value, hash in zip(keys, values, hashes):
+            index = hash % capacity
+            if buckets[index] is None:
+                buckets[index] = LinkedList()
+                hash_map._occupied += 1
+            buckets[index].insert(key, value, hash)
+
+        hash_map._buckets = DynamicArray(buckets)
+        hash_map._capacity = capacity
+        hash_map._size = len(keys)
+        hash_map._min_capacity = min_capacity
+        return hash_map
+
+
+def find_mode(da, function=hash_function_1) -> (DynamicArray, int):
     """
-    Receives a DynamicArray, returns a tuple containing, first, a DynamicArray
-    comprising the mode value/s of the array, and second, an integer that
-    represents the highest frequency.
+    Receives a DynamicArray (or any other iterable), returns a tuple
+    containing, first, a DynamicArray comprising the mode value/s of the
+    array, and second, an integer that represents the highest frequency.
     If there is more than one value with the highest frequency, all values at
-    that frequency are included in the returned array.
+    that frequency are included in the returned array, in the order they
+    reached it.
 
-    Utilizes 3 separate O(N) loops, making the whole function O(N) complexity.
+    Makes a single pass over the input, hashing each element once to
+    increment its count, while keeping track of the highest frequency as it
+    goes. That makes the whole function O(N), and the input can be a stream
+    that is consumed as it is read.
     """
-    map = HashMap(da.length() // 3, hash_function_1)
+    # the map grows as distinct values show up, so it can start out small
+    map = HashMap(16, function)
 
-    # iterating through the da, using put() to hash the da element into the map
-    # for loop is O(N) complexity
-    for index in range(da.length()):
-        # .get_at_index() is O(1)
-        current_key = da.get_at_index(index)
-        # .contains_key is amortized O(1)
-        # if the key is already in the map, increment its value(frequency)
-        if map.contains_key(current_key):
-            # .get() is amortized O(1)
-            current_value = map.get(current_key)
-            # .put() is amortized O(1)
-            map.put(current_key, current_value + 1)
-        # if the key is not in the map, add it with a frequency of 1
-        else:
-            map.put(current_key, 1)
+    # DynamicArray doesn't support iteration, so walk it by index
+    elements = da
+    if isinstance(da, DynamicArray):
+        elements = (da.get_at_index(index) for index in range(da.length()))
 
     max_freq = 0
-    result_da = DynamicArray()
-
-    # iterating through hash map, updating max_freq with the highest frequency.
-    # again, for loop is O(N), get_at_index() and get() are both amortized O(1)
-    for index in range(da.length()):
-        current_key = da.get_at_index(index)
-        current_value = map.get(current_key)
+    modes = []
+    for current_key in elements:
+        # .increment() is amortized O(1)
+        current_value = map.increment(current_key)
         if current_value > max_freq:
+            # a new highest frequency, this value is the only mode so far
             max_freq = current_value
+            modes = [current_key]
+        elif current_value == max_freq:
+            modes.append(current_key)
 
-    # iterating through hash map again, comparing values to max_freq
-    # this loop also O(N), all functions used inside are amortized O(1)
-    for index in range(da.length()):
-        current_key = da.get_at_index(index)
-        current_value = map.get(current_key)
-        if current_value == max_freq:
-            result_da.append(current_key)
-            # if we don't remove the key after appending it to the result_da,
-            # we will run into it again later and append it a second time.
-            map.remove(current_key)
-
-    result = (result_da, max_freq)
+    result = (DynamicArray(modes), max_freq)
     return result
 
 
+class CountMinSketch:
+    """
+    Count-Min sketch: approximate counts for an unbounded number of distinct
+    keys in a fixed width x depth table of counters. Estimates never
+    undercount, and overcount by at most 2N/width (N being the total of all
+    counts) with probability 1 - 1/2^depth.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0) -> None:
+        """Initialize an empty sketch."""
+        self._width = width
+        self._depth = depth
+        self._seed = seed
+        self._counters = array('Q', bytes(8 * width * depth))
+
+    def _indices(self, key: str) -> list:
+        """
+        Returns the index of the counter of the key in every row. The rows
+        use h1 + row * h2 with both halves of a single 64-bit hash, rather
+        than running depth separate hash functions.
+        """
+        hash = hash_function_mix(key, self._seed)
+        h1, h2 = hash & 0xFFFFFFFF, (hash >> 32) | 1
+        width = self._width
+        return [row * width + (h1 + row * h2) % width
+                for row in range(self._depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Adds count to the key and returns its new estimate."""
+        counters = self._counters
+        estimate = None
+        for index in self._indices(key):
+            counters[index] += count
+            if estimate is None or counters[index] < estimate:
+                estimate = counters[index]
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """Returns the estimated count of the key."""
+        counters = self._counters
+        return min(counters[index] for index in self._indices(key))
+
+
+def find_top_k(da, k: int, function=hash_function_1,
+               sketch: CountMinSketch = None) -> DynamicArray:
+    """
+    Receives a DynamicArray (or any other iterable) and returns a
+    DynamicArray of up to k (value, count) tuples for the most frequent
+    values, highest count first.
+    Unlike find_mode, only k counters are ever kept, so memory stays fixed
+    no matter how many distinct values the input has, at the cost of
+    approximate counts:
+    - by default the Space-Saving algorithm is used. When a value shows up
+      and all k counters are taken, the value with the smallest count is
+      evicted and the new one takes over its count plus one. Counts may be
+      overestimated by at most N/k, and every value that occurs more than
+      N/k times is guaranteed to be reported.
+    - if a CountMinSketch is given, counts come from the sketch, and the k
+      values with the highest estimates seen so far are kept.
+    """
+    if k < 1:
+        return DynamicArray()
+
+    counts = HashMap(16, function)
+    # min-heap of (count, sequence number, value), one entry per monitored
+    # value. Counts only grow, so an entry can be stale (too low); stale
+    # entries are fixed up lazily when they reach the top of the heap.
+    heap = []
+    sequence = itertools.count()
+
+    def pop_smallest() -> (int, str):
+        """Removes and returns the monitored value with the lowest count."""
+        while True:
+            count, _, value = heapq.heappop(heap)
+            actual = counts.get(value)
+            if actual == count:
+                return count, value
+            heapq.heappush(heap, (actual, next(sequence), value))
+
+    elements = da
+    if isinstance(da, DynamicArray):
+        elements = (da.get_at_index(index) for index in range(da.length()))
+
+    for current_key in elements:
+        if sketch is None:
+            if counts.get_size() < k or counts.contains_key(current_key):
+                count = counts.increment(current_key)
+                if count == 1:
+                    heapq.heappush(heap, (count, next(sequence), current_key))
+                continue
+            # take over the counter of the least frequent value
+            smallest, victim = pop_smallest()
+            counts.remove(victim)
+            counts.put(current_key, smallest + 1)
+            heapq.heappush(heap, (smallest + 1, next(sequence), current_key))
+        else:
+            estimate = sketch.add(current_key)
+            if counts.contains_key(current_key):
+                counts.put(current_key, estimate)
+            elif counts.get_size() < k:
+                counts.put(current_key, estimate)
+                heapq.heappush(heap, (estimate, next(sequence), current_key))
+            else:
+                smallest, victim = pop_smallest()
+                if estimate > smallest:
+                    counts.remove(victim)
+                    victim, smallest = current_key, estimate
+                    counts.put(victim, smallest)
+                heapq.heappush(heap, (smallest, next(sequence), victim))
+
+    top = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    return DynamicArray(top)
+
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
 
+    import os
+    import random
+    import tempfile
+
     print("\nPDF - put example 1")
     print("-------------------")
     m = HashMap(50, hash_function_1)
@@ -450,6 +983,16 @@ if __name__ == "__main__":
     m.resize_table(2)
     print(m.get_keys())
 
+    print("\nkeys / values / items example 1")
+    print("-------------------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(100, 200, 10):
+        m.put(str(i), i * 10)
+    m.remove('150')
+    print(sorted(m.keys()))
+    print(sum(m.values()))
+    print(all(m.get(key) == value for key, value in m.items()))
+
     print("\nPDF - find_mode example 1")
     print("-----------------------------")
     da = DynamicArray(["apple", "apple", "grape", "melon", "melon", "peach"])
@@ -470,3 +1013,85 @@ if __name__ == "__main__":
         map = HashMap(da.length() // 3, hash_function_2)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode: {mode}, Frequency: {frequency}\n")
+
+    print("\nfind_mode streaming example")
+    print("---------------------------")
+    for case in ([], ["solo"], ["a", "b"]):
+        mode, frequency = find_mode(DynamicArray(case))
+        print(f"Input: {case}\nMode: {mode}, Frequency: {frequency}\n")
+    mode, frequency = find_mode('str' + str(i % 7) for i in range(100000))
+    print(f"Input: generator of 100000 keys\nMode: {mode}, Frequency: {frequency}")
+
+    print("\nfind_top_k example")
+    print("------------------")
+    # 3 heavy hitters hidden among 300 values that occur once each
+    stream = ["Ubuntu"] * 200 + ["Mint"] * 120 + ["Arch"] * 80 + \
+             ['distro' + str(i) for i in range(300)]
+    random.Random(261).shuffle(stream)
+    top = find_top_k(stream, 10)
+    print(top.get_at_index(0), top.get_at_index(1), top.get_at_index(2))
+    top = find_top_k(stream, 3, sketch=CountMinSketch(256, 4))
+    print(top.get_at_index(0), top.get_at_index(1), top.get_at_index(2))
+
+    print("\ndump / load example")
+    print("-------------------")
+    m = HashMap(20, hash_function_2, max_load=2.0)
+    for i in range(100):
+        m.put('key' + str(i), [i])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot')
+        m.dump(path)
+        restored = HashMap.load(path)
+    print(restored.get_size(), restored.get_capacity(), restored.empty_buckets() == m.empty_buckets(),
+          dict(restored.items()) == dict(m.items()), restored.get('key1'))
+
+    print("\nstats example")
+    print("-------------")
+    m = HashMap(10, hash_function_1, instrument=True)
+    for i in range(50):
+        m.put('key' + str(i), i)
+    m.put_many(('key' + str(i), i) for i in range(50, 100))
+    for i in range(100):
+        m.get('key' + str(i))
+    m.get_many('key' + str(i) for i in range(100, 200))
+    for i in range(0, 100, 2):
+        m.remove('key' + str(i)) if i % 4 else m.pop('key' + str(i))
+    m.update_with('key1', str)
+    stats = m.get_stats()
+    print(stats['size'], stats['capacity'], stats['max_chain'], stats['resizes'],
+          stats['hash_calls'], {op: s['calls'] for op, s in stats['operations'].items()})
+    print(stats['operations']['get']['max_probes'], stats['operations']['get']['histogram'])
+    m.set_instrumented(False)
+    print(m.get_stats()['instrumented'])
+
+    print("\nempty_buckets counter example")
+    print("-----------------------------")
+    # the O(1) count must always agree with a scan of the table
+    rnd = random.Random(261)
+    m = HashMap(7, hash_function_2)
+    result = True
+    for n in range(20000):
+        key = 'key' + str(rnd.randrange(500))
+        operation = rnd.random()
+        if operation < 0.3:
+            m.put(key, n)
+        elif operation < 0.5:
+            m.remove(key)
+        elif operation < 0.6:
+            m.pop(key)
+        elif operation < 0.7:
+            m.increment(key)
+        elif operation < 0.8:
+            m.update_with(key, abs, -n)
+        elif operation < 0.998:
+            m.setdefault(key, n)
+        elif operation < 0.999:
+            m.resize_table(rnd.randrange(1, 2000))
+        else:
+            m.clear()
+        scan = 0
+        for i in range(m.get_capacity()):
+            bucket = m._buckets.get_at_index(i)
+            scan += bucket is None or bucket.length() == 0
+        result &= m.empty_buckets() == scan
+    print(result, m.get_size(), m.get_capacity())
@@ -0,0 +1,350 @@
+# Description: HashMap split into independent shards so that bulk builds and
+#              bulk lookups can run on several cores. Every key belongs to
+#              exactly one shard, picked from its hash, and every shard is a
+#              hash_map_flat.HashMap. put_many() and get_many() hash and
+#              partition the keys in the calling process, hand each shard's
+#              part to a ProcessPoolExecutor and merge the results; all other
+#              operations work on the shards in place, like any HashMap.
+#              Flat shards pickle as a few lists and arrays, so sending a
+#              built shard back from a worker costs far less than building
+#              it did.
+
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from a6_include import DynamicArray, hash_function_1, hash_function_mix
+import hash_map_flat
+from hash_vectorized import (MIN_BATCH, VECTORIZED, batch_positions, batch_span,
+                             hash_keys, np)
+
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+# 2^64 / golden ratio, for Fibonacci hashing
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+# ------------------- WORKER SIDE ------------------------------------------ #
+
+# shards of the map a pool was started for, see ShardedHashMap.get_many()
+_worker_shards = None
+
+
+def _init_worker(shards: list) -> None:
+    """Pool initializer: keeps the shards for _lookup_shard()."""
+    global _worker_shards
+    _worker_shards = shards
+
+
+def _build_shard(shard: hash_map_flat.HashMap, keys: list, values: list,
+                 hashes: array) -> hash_map_flat.HashMap:
+    """
+    Puts the key/value pairs into the shard, given the hashes of the keys,
+    and returns it. The shard is grown once, up front, to fit all of them.
+    """
+    # repeated keys of the batch take a single slot
+    needed = shard.get_size() + len(set(keys))
+    if needed / shard.get_capacity() >= 0.5:
+        shard.resize_table(needed * 2 + 1)
+    insert = shard._insert
+    for key, value, hash in zip(keys, values, hashes):
+        insert(key, value, hash)
+    return shard
+
+
+def _lookup_shard(index: int, keys: list, hashes: array) -> list:
+    """
+    Returns the values of the keys in the given shard of the worker's map,
+    None for keys that are not in it.
+    """
+    shard = _worker_shards[index]
+    find_index, shard_values = shard._find_index, shard._values
+    values = []
+    for key, hash in zip(keys, hashes):
+        slot = find_index(key, hash)
+        values.append(None if slot == -1 else shard_values[slot])
+    return values
+
+
+# ------------------- MAP -------------------------------------------------- #
+
+class ShardedHashMap:
+    def __init__(self, capacity: int, function, shards: int = 8) -> None:
+        """
+        Initialize new ShardedHashMap with the given total capacity, spread
+        over the given number of shards (rounded up to a power of two).
+        """
+        self._shard_bits = max(shards - 1, 0).bit_length()
+        shard_count = 1 << self._shard_bits
+        shard_capacity = max(capacity // shard_count, 1)
+
+        self._hash_function = function
+        self._shards = [hash_map_flat.HashMap(shard_capacity, function)
+                        for _ in range(shard_count)]
+
+    def _shard_index(self, hash: int) -> int:
+        """
+        Returns the shard of the given (64-bit) hash, taken from the high
+        bits of the hash multiplied by a large odd constant so that it is
+        independent of the low bits each shard uses to pick a slot.
+        """
+        if self._shard_bits == 0:
+            return 0
+        return ((hash * _FIBONACCI_MULTIPLIER) & _MASK_64) >> (64 - self._shard_bits)
+
+    def _shard_for(self, key: str) -> hash_map_flat.HashMap:
+        """Returns the shard the given key belongs to."""
+        hash = self._hash_function(key) & _MASK_64
+        return self._shards[self._shard_index(hash)]
+
+    def _partition(self, keys: list) -> list:
+        """
+        Hashes the keys and splits their positions in the list by shard.
+        Returns one (positions, hashes) pair per shard, the hashes as an
+        array of unsigned 64-bit ints, which pickles as a single buffer.
+        """
+        vectorized = VECTORIZED.get(self._hash_function)
+        if np is not None and vectorized is not None and len(keys) >= MIN_BATCH:
+            return self._partition_vectorized(keys, vectorized)
+
+        parts = [([], array('Q')) for _ in self._shards]
+        shard_index = self._shard_index
+        for position, hash in enumerate(hash_keys(self._hash_function, keys)):
+            hash &= _MASK_64
+            positions, shard_hashes = parts[shard_index(hash)]
+            positions.append(position)
+            shard_hashes.append(hash)
+        return parts
+
+    def _partition_vectorized(self, keys: list, vectorized) -> list:
+        """
+        _partition() with NumPy: the keys are hashed in batches and sorted
+        by shard without a Python loop over them.
+        """
+        batches, single = batch_positions(keys)
+        hashes = np.empty(len(keys), dtype=np.uint64)
+        for positions in batches:
+            span = batch_span(positions)
+            if span is not None:
+                start, stop = span
+                hashes[start:stop] = vectorized(keys[start:stop]).astype(np.uint64)
+            else:
+                hashes[positions] = vectorized(
+                    [keys[i] for i in positions.tolist()]).astype(np.uint64)
+        function = self._hash_function
+        hashes[single] = np.fromiter(
+            (function(keys[i]) & _MASK_64 for i in single.tolist()),
+            dtype=np.uint64, count=len(single))
+        if self._shard_bits == 0:
+            shards = np.zeros(len(keys), dtype=np.int64)
+        else:
+            # uint64 arithmetic wraps around, as the masks in _shard_index do
+            shards = (hashes * np.uint64(_FIBONACCI_MULTIPLIER)
+                      >> np.uint64(64 - self._shard_bits)).astype(np.int64)
+
+        order = np.argsort(shards, kind='stable')
+        ends = np.cumsum(np.bincount(shards, minlength=len(self._shards)))
+        parts = []
+        start = 0
+        for end in ends.tolist():
+            positions = order[start:end]
+            parts.append((positions.tolist(),
+                          array('Q', hashes[positions].tobytes())))
+            start = end
+        return parts
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for index, shard in enumerate(self._shards):
+            out += 'shard ' + str(index) + ':\n' + str(shard)
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(shard.get_size() for shard in self._shards)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, summed over all shards
+        """
+        return sum(shard.get_capacity() for shard in self._shards)
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, adding it if the key is
+        not in the hash map yet.
+        """
+        self._shard_for(key).put(key, value)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key. If the key is not in
+        the hash map, returns None.
+        """
+        return self._shard_for(key).get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns: True - if the given key is in the hash map
+                 False - Otherwise
+        """
+        return self._shard_for(key).contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self._shard_for(key).remove(key)
+
+    def put_many(self, pairs, workers: int = None) -> None:
+        """
+        Puts every (key, value) pair of the given iterable into the hash map.
+        The shards are filled by a pool of the given number of worker
+        processes (by default one per CPU); with 1 worker, or a single
+        shard, everything runs in this process.
+        """
+        pairs = list(pairs)
+        keys = [key for key, _ in pairs]
+        values = [value for _, value in pairs]
+        tasks = [(index, [keys[position] for position in positions],
+                  [values[position] for position in positions], hashes)
+                 for index, (positions, hashes)
+                 in enumerate(self._partition(keys)) if positions]
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) <= 1:
+            for index, shard_keys, shard_values, hashes in tasks:
+                _build_shard(self._shards[index], shard_keys, shard_values,
+                             hashes)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [(index, pool.submit(_build_shard, self._shards[index],
+                                           *task))
+                       for index, *task in tasks]
+            # the workers filled copies, the results replace the originals
+            for index, future in futures:
+                self._shards[index] = future.result()
+        return
+
+    def get_many(self, keys, workers: int = None) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value associated with each key of the
+        given iterable, in the same order. Keys that are not in the hash map
+        get None. The shards are searched by a pool of the given number of
+        worker processes (by default one per CPU), started with a copy of
+        the shards; with 1 worker everything runs in this process.
+        """
+        keys = list(keys)
+        parts = self._partition(keys)
+        values = [None] * len(keys)
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            _init_worker(self._shards)
+            try:
+                for index, (positions, hashes) in enumerate(parts):
+                    shard_keys = [keys[position] for position in positions]
+                    found = _lookup_shard(index, shard_keys, hashes)
+                    for position, value in zip(positions, found):
+                        values[position] = value
+            finally:
+                _init_worker(None)
+            return DynamicArray(values)
+
+        # on platforms that fork, the workers inherit the shards instead of
+        # receiving a pickled copy
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self._shards,)) as pool:
+            futures = []
+            for index, (positions, hashes) in enumerate(parts):
+                if positions:
+                    shard_keys = [keys[position] for position in positions]
+                    futures.append((positions, pool.submit(
+                        _lookup_shard, index, shard_keys, hashes)))
+            for positions, future in futures:
+                for position, value in zip(positions, future.result()):
+                    values[position] = value
+        return DynamicArray(values)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return sum(shard.empty_buckets() for shard in self._shards)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the total capacity of the hash table, splitting it evenly
+        over the shards.
+        """
+        if new_capacity < 1:
+            return
+
+        shard_capacity = max(new_capacity // len(self._shards), 1)
+        for shard in self._shards:
+            shard.resize_table(shard_capacity)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        for shard in self._shards:
+            shard.clear()
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a DynamicArray that contains all the keys stored in the hash
+        map. Order does not matter.
+        """
+        result_da = DynamicArray()
+        for shard in self._shards:
+            keys = shard.get_keys()
+            for index in range(keys.length()):
+                result_da.append(keys[index])
+        return result_da
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput_many / get_many")
+    print("-------------------")
+    pairs = [('str' + str(i), i) for i in range(5000)]
+    for workers in (1, 2):
+        m = ShardedHashMap(64, hash_function_mix, shards=4)
+        m.put_many(pairs, workers=workers)
+        m.put('extra', -1)
+        m.remove('str0')
+        values = m.get_many(['str' + str(i) for i in range(5001)] + ['extra'],
+                            workers=workers)
+        expected = [None] + list(range(1, 5000)) + [None, -1]
+        print(workers, m.get_size(),
+              [values[i] for i in range(values.length())] == expected)
+
+    print("\nsingle key operations")
+    print("---------------------")
+    m = ShardedHashMap(10, hash_function_1, shards=3)
+    for i in range(100, 200, 10):
+        m.put(str(i), str(i * 10))
+    m.remove('150')
+    print(m.get_size(), m.get('110'), m.get('150'), m.contains_key('190'))
+    m.resize_table(1)
+    print(m.get_size(), m.get_capacity(), m.get('120'))
+    m.clear()
+    print(m.get_size(), m.get_keys())
@@ -0,0 +1,59 @@
+# Description: Binary snapshot format shared by the dump() and load() methods
+#              of the HashMaps. A snapshot is a fixed header (map kind, hash
+#              function id, capacity, number of entries), the stored hashes
+#              as one block of unsigned 64-bit ints, and the keys and values
+#              as two pickled lists. Restoring reads each part in a single
+#              call and never runs a key through the hash function again, so
+#              the map can put every entry straight into its bucket at the
+#              saved capacity.
+
+
+import pickle
+import struct
+from array import array
+
+from a6_include import HASH_FUNCTION_IDS, hash_function_id
+
+
+_MAGIC = b'HMAPSNP1'
+# magic, map kind, hash function id, capacity, number of entries
+_HEADER = struct.Struct('<8s2sQQQ')
+
+
+def write_snapshot(path: str, kind: bytes, function, capacity: int,
+                   keys: list, values: list, hashes: list,
+                   extra: object = None) -> None:
+    """
+    Writes a snapshot of a map of the given kind (a two byte tag) to path.
+    extra holds any settings of the map besides its capacity, and must be
+    picklable. Raises ValueError if the hash function has no stable id.
+    """
+    header = _HEADER.pack(_MAGIC, kind, hash_function_id(function), capacity,
+                          len(keys))
+    with open(path, 'wb') as snapshot:
+        snapshot.write(header)
+        array('Q', hashes).tofile(snapshot)
+        pickle.dump((keys, values, extra), snapshot, pickle.HIGHEST_PROTOCOL)
+
+
+def read_snapshot(path: str, kind: bytes) -> tuple:
+    """
+    Reads the snapshot at path, which must be of the given kind. Returns
+    (function, capacity, keys, values, hashes, extra), the hashes as an
+    array of unsigned 64-bit ints.
+    """
+    with open(path, 'rb') as snapshot:
+        magic, stored_kind, function_id, capacity, count = _HEADER.unpack(
+            snapshot.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a hash map snapshot")
+        if stored_kind != kind:
+            raise ValueError(f"{path} holds a {stored_kind.decode()} hash map "
+                             f"snapshot, not {kind.decode()}")
+        if function_id not in HASH_FUNCTION_IDS:
+            raise ValueError(f"{path} uses unknown hash function id {function_id}")
+
+        hashes = array('Q')
+        hashes.fromfile(snapshot, count)
+        keys, values, extra = pickle.load(snapshot)
+    return HASH_FUNCTION_IDS[function_id], capacity, keys, values, hashes, extra
@@ -0,0 +1,81 @@
+# Description: Counters for instrumented HashMaps. A map created with
+#              instrument=True (or switched with set_instrumented()) holds a
+#              HashMapStats and reports to it from its own probing paths: how
+#              many buckets or chain nodes each lookup, insert and removal
+#              looked at, the number and time of resizes and the time spent
+#              in the hash function. A map that isn't instrumented only pays
+#              for checking that it has no HashMapStats.
+
+
+import time
+
+from hash_vectorized import hash_keys
+
+
+# lookups (get, contains_key, get_many), inserts and updates (put,
+# put_many, increment, update_with, setdefault) and removals (remove,
+# remove_many, pop)
+OPERATIONS = ('get', 'put', 'remove')
+
+
+class HashMapStats:
+    """
+    Counters of one instrumented HashMap.
+    """
+
+    def __init__(self) -> None:
+        # operation -> {probe length: number of calls}
+        self.probes = {operation: {} for operation in OPERATIONS}
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.hash_calls = 0
+        self.hash_seconds = 0.0
+
+    def record(self, operation: str, probes: int) -> None:
+        """Counts one operation that looked at probes slots or nodes."""
+        histogram = self.probes[operation]
+        histogram[probes] = histogram.get(probes, 0) + 1
+
+    def record_resize(self, seconds: float) -> None:
+        """Counts one resize of the table that took the given time."""
+        self.resizes += 1
+        self.resize_seconds += seconds
+
+    def timed_hash(self, function, key: str) -> int:
+        """Returns function(key), counting the call and its time."""
+        start = time.perf_counter()
+        hash = function(key)
+        self.hash_seconds += time.perf_counter() - start
+        self.hash_calls += 1
+        return hash
+
+    def timed_hash_keys(self, function, keys: list):
+        """Returns hash_keys(function, keys), counting one call per key."""
+        start = time.perf_counter()
+        hashes = hash_keys(function, keys)
+        self.hash_seconds += time.perf_counter() - start
+        self.hash_calls += len(keys)
+        return hashes
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters as a dict of plain values, with the count, mean
+        and max probe length and the histogram of each operation.
+        """
+        operations = {}
+        for operation, histogram in self.probes.items():
+            calls = sum(histogram.values())
+            total = sum(length * count for length, count in histogram.items())
+            operations[operation] = {
+                'calls': calls,
+                'mean_probes': total / calls if calls else 0.0,
+                'max_probes': max(histogram, default=0),
+                'histogram': dict(sorted(histogram.items())),
+            }
+        return {
+            'operations': operations,
+            'resizes': self.resizes,
+            'resize_seconds': self.resize_seconds,
+            'hash_calls': self.hash_calls,
+            'hash_seconds': self.hash_seconds,
+        }
@@ -0,0 +1,235 @@
+# Description: NumPy implementations of the hash functions in a6_include that
+#              hash a whole batch of keys at once. Keys are packed into a
+#              padded matrix of code points (or UTF-8 bytes) and hashed one
+#              column at a time, so the per-key Python loop disappears. Every
+#              function returns exactly the same values as its scalar
+#              counterpart. hash_keys() groups the keys by length first, so
+#              that a few long keys don't make every row of the matrix long;
+#              keys longer than MAX_LENGTH are hashed by the scalar function.
+#              NumPy is optional: hash_keys() falls back to calling the scalar
+#              function on each key when it isn't installed.
+
+
+from a6_include import (hash_function_1, hash_function_2,
+                        hash_function_fnv1a, hash_function_mix,
+                        _FNV_OFFSET_BASIS, _FNV_PRIME,
+                        _MIX_PRIME_1, _MIX_PRIME_2, _MIX_PRIME_3)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# batches smaller than this are hashed with the scalar function, since the
+# fixed cost of packing the keys outweighs the gain
+MIN_BATCH = 64
+
+# upper bounds of the length groups: the keys packed together are at most
+# twice as long as each other (above 8 characters), so padding them to the
+# longest one wastes at most half of the matrix
+LENGTH_LIMITS = (8, 16, 32, 64, 128, 256)
+# keys longer than this are hashed by the scalar function, which is as fast
+# per character as the column loop for a handful of rows
+MAX_LENGTH = LENGTH_LIMITS[-1]
+# characters in a batch (rows times the group's length limit), which bounds
+# the size of the padded matrix
+MATRIX_CELLS = 1 << 20
+
+
+def _code_points(keys: list) -> "np.ndarray":
+    """
+    Returns an (n, longest key) uint32 matrix of the code points of the keys,
+    padded with zeros.
+    """
+    return np.array(keys, dtype=str).view(np.uint32).reshape(len(keys), -1)
+
+
+def _utf8_bytes(keys: list, multiple: int = 1) -> ("np.ndarray", "np.ndarray"):
+    """
+    Returns an (n, width) uint8 matrix of the UTF-8 encodings of the keys,
+    padded with zeros to a width that is a multiple of the given number,
+    along with the encoded length of every key.
+    """
+    encoded = [key.encode('utf-8') for key in keys]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(keys))
+    width = int(lengths.max()) if len(keys) else 0
+    width += -width % multiple
+    packed = b''.join(data.ljust(width, b'\0') for data in encoded)
+    matrix = np.frombuffer(packed, dtype=np.uint8).reshape(len(keys), width)
+    return matrix, lengths
+
+
+def hash_function_1_vectorized(keys: list) -> "np.ndarray":
+    """Vectorized hash_function_1: sum of the code points of each key."""
+    if not keys:
+        return np.zeros(0, dtype=np.int64)
+    return _code_points(keys).sum(axis=1, dtype=np.int64)
+
+
+def hash_function_2_vectorized(keys: list) -> "np.ndarray":
+    """
+    Vectorized hash_function_2: sum of the code points of each key weighted
+    by their position, counting from 1.
+    """
+    if not keys:
+        return np.zeros(0, dtype=np.int64)
+    matrix = _code_points(keys).astype(np.int64)
+    weights = np.arange(1, matrix.shape[1] + 1, dtype=np.int64)
+    return matrix @ weights
+
+
+def hash_function_fnv1a_vectorized(keys: list) -> "np.ndarray":
+    """Vectorized hash_function_fnv1a, as uint64."""
+    matrix, lengths = _utf8_bytes(keys)
+    hashes = np.full(len(keys), _FNV_OFFSET_BASIS, dtype=np.uint64)
+    prime = np.uint64(_FNV_PRIME)
+    for column in range(matrix.shape[1]):
+        # keys shorter than this column are done and must not change
+        active = lengths > column
+        mixed = (hashes ^ matrix[:, column].astype(np.uint64)) * prime
+        hashes = np.where(active, mixed, hashes)
+    return hashes
+
+
+def hash_function_mix_vectorized(keys: list, seed: int = 0) -> "np.ndarray":
+    """Vectorized hash_function_mix, as uint64."""
+    matrix, lengths = _utf8_bytes(keys, 8)
+    words = matrix.view('<u8').astype(np.uint64)
+    word_counts = (lengths + 7) // 8
+
+    mask = (1 << 64) - 1
+    hashes = ((seed + _MIX_PRIME_3) & mask) + lengths.astype(np.uint64)
+    prime_1 = np.uint64(_MIX_PRIME_1)
+    for column in range(words.shape[1]):
+        active = word_counts > column
+        mixed = (hashes ^ words[:, column]) * prime_1
+        mixed ^= mixed >> np.uint64(31)
+        hashes = np.where(active, mixed, hashes)
+
+    # final avalanche
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= np.uint64(_MIX_PRIME_2)
+    hashes ^= hashes >> np.uint64(29)
+    hashes *= np.uint64(_MIX_PRIME_3)
+    hashes ^= hashes >> np.uint64(32)
+    return hashes
+
+
+def batch_positions(keys: list) -> (list, "np.ndarray"):
+    """
+    Splits the positions of the keys into the batches to hash with a
+    vectorized function, each holding keys of the same length group and at
+    most MATRIX_CELLS characters of padded matrix, and returns them along
+    with the positions of the keys to hash one at a time: those longer than
+    MAX_LENGTH and those of groups too small to be worth packing, even with
+    the shorter groups merged into them.
+    """
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    # index of the length group of every key, len(LENGTH_LIMITS) if too long
+    groups = np.searchsorted(LENGTH_LIMITS, lengths)
+    counts = np.bincount(groups, minlength=len(LENGTH_LIMITS) + 1).tolist()
+
+    # a group too small to be worth packing on its own is packed with the
+    # next longer one, at the cost of padding its keys a little more
+    target = list(range(len(counts)))
+    pending, pending_count = [], 0
+    for group in range(len(LENGTH_LIMITS)):
+        pending.append(group)
+        pending_count += counts[group]
+        if pending_count >= MIN_BATCH:
+            for merged in pending:
+                target[merged] = group
+            pending, pending_count = [], 0
+    groups = np.array(target)[groups]
+
+    # stable, so keys of the same group keep their order
+    order = np.argsort(groups, kind='stable')
+    ends = np.cumsum(np.bincount(groups, minlength=len(counts))).tolist()
+
+    batches, single = [], []
+    start = 0
+    for limit, end in zip(LENGTH_LIMITS, ends):
+        rows = MATRIX_CELLS // limit
+        for first in range(start, end, rows):
+            positions = order[first:min(first + rows, end)]
+            if len(positions) < MIN_BATCH:
+                single.append(positions)
+            else:
+                batches.append(positions)
+        start = end
+    single.append(order[start:])
+    return batches, np.concatenate(single)
+
+
+def batch_span(positions: "np.ndarray") -> (int, int):
+    """
+    Returns the (start, stop) of the slice of keys the given batch of
+    positions covers, or None if the positions are not consecutive. The
+    positions of a batch are in increasing order, so they are consecutive
+    when they span exactly as many keys as there are of them.
+    """
+    start, stop = int(positions[0]), int(positions[-1]) + 1
+    return (start, stop) if stop - start == len(positions) else None
+
+
+VECTORIZED = {
+    hash_function_1: hash_function_1_vectorized,
+    hash_function_2: hash_function_2_vectorized,
+    hash_function_fnv1a: hash_function_fnv1a_vectorized,
+    hash_function_mix: hash_function_mix_vectorized,
+}
+
+
+def hash_keys(function, keys: list) -> list:
+    """
+    Returns a list with the hash of each key, as Python ints. When NumPy is
+    available and the function has a vectorized version, the keys are
+    hashed in batches; otherwise the function is called on every key.
+    """
+    vectorized = VECTORIZED.get(function)
+    if np is None or vectorized is None or len(keys) < MIN_BATCH:
+        return [function(key) for key in keys]
+
+    batches, single = batch_positions(keys)
+    hashes = [None] * len(keys)
+    for positions in batches:
+        span = batch_span(positions)
+        if span is not None:
+            # usually the case, unless the keys of the batch are mixed with
+            # keys of a different length
+            start, stop = span
+            hashes[start:stop] = vectorized(keys[start:stop]).tolist()
+            continue
+        positions = positions.tolist()
+        for position, hash in zip(positions,
+                                  vectorized([keys[i] for i in positions]).tolist()):
+            hashes[position] = hash
+    for position in single.tolist():
+        hashes[position] = function(keys[position])
+    return hashes
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nparity with the scalar hash functions")
+    print("-------------------------------------")
+    if np is None:
+        print("NumPy is not installed")
+    else:
+        keys = (['str' + str(i) for i in range(1000)] +
+                ['', 'a', 'a\0', '\0', 'ünïcødé', '日本語のキー', '🙂' * 9,
+                 'x' * 100, 'exactly8', 'exactly16bytes!!'])
+        for function, vectorized in VECTORIZED.items():
+            expected = [function(key) for key in keys]
+            print(function.__name__, vectorized(keys).tolist() == expected,
+                  hash_keys(function, keys) == expected)
+
+        print("\none long key among short ones")
+        print("------------------------------")
+        keys = ['str' + str(i) for i in range(2000)] + ['x' * 50_000]
+        for function in VECTORIZED:
+            print(function.__name__,
+                  hash_keys(function, keys) == [function(key) for key in keys])